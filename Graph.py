@@ -1,10 +1,12 @@
 class DummyPuzzle:
 
-    def __init__(self, graph, start, end, blocks=None):
+    def __init__(self, graph, start, end, blocks=None, heuristic=None):
         self.graph = graph
         self.start = start
         self.end = end
         self.blocks = set(blocks) if blocks else set()
+        # heuristic(start, end) estimates the cost from start to end
+        self._heuristic = heuristic
 
     def fail_fast(self) -> bool:
         return self.start in self.blocks
@@ -13,11 +15,23 @@ class DummyPuzzle:
         return self.start == self.end
 
     def extensions(self):
-        R = []
-        neis = self.graph[self.start]
-        for n in neis:
-            R.append(DummyPuzzle(self.graph, n, self.end, self.blocks))
-        return R
+        return list(self.iter_extensions())
+
+    def iter_extensions(self):
+        for n in self.graph[self.start]:
+            yield DummyPuzzle(self.graph, n, self.end, self.blocks,
+                              self._heuristic)
+
+    def heuristic(self):
+        if self._heuristic is None:
+            return 0
+        return self._heuristic(self.start, self.end)
+
+    def step_cost(self, extension):
+        return 1
+
+    def state_key(self):
+        return self.start, self.end
 
     def __repr__(self):
         return f'({self.start} -> {self.end})'
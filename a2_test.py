@@ -1,3 +1,7 @@
+import io
+import json
+import os
+import tempfile
 import unittest
 from unittest.mock import patch
 from sudoku_puzzle import *
@@ -5,6 +9,7 @@ from solver import *
 from word_ladder_puzzle import *
 from expression_tree import *
 from expression_tree_puzzle import *
+from Graph import DummyPuzzle
 
 
 class TestUtil(unittest.TestCase):
@@ -346,6 +351,34 @@ class Part2Test(TestUtil):
     def test_unique_solution_5(self):
         self.assertFalse(self.fail_board.has_unique_solution())
 
+    def test_count_solutions(self):
+        solver = DfsSolver()
+        self.assertEqual(2, solver.count_solutions(self.board_9_9))
+        self.assertEqual(1, solver.count_solutions(self.board_4_4_2))
+        self.assertEqual(0, solver.count_solutions(self.fail_board))
+        self.assertEqual(288, solver.count_solutions(self.empty_board))
+        self.assertEqual(5, solver.count_solutions(self.empty_board, 5))
+
+    def test_iter_solutions(self):
+        solutions = list(DfsSolver().iter_solutions(self.board_9_9))
+        self.assertEqual(2, len(solutions))
+        self.assertNotEqual(str(solutions[0][-1]), str(solutions[1][-1]))
+        for path in solutions:
+            self.assertEqual(self.board_9_9, path[0])
+            self.assertTrue(path[-1].is_solved())
+        first = next(DfsSolver().iter_solutions(self.board_4_4_2))
+        self.assertEqual(DfsSolver().solve(self.board_4_4_2), first)
+
+    def test_unique_solution_given_solver(self):
+        # IDAStarSolver counts solutions with the depth first search it
+        # inherits from Solver, not with its bounded searches
+        solver = IDAStarSolver()
+        self.assertFalse(self.board_9_9.has_unique_solution(solver))
+        self.assertFalse(self.board_4_4.has_unique_solution(solver))
+        self.assertTrue(self.board_4_4_2.has_unique_solution(solver))
+        self.assertFalse(self.empty_board.has_unique_solution(solver))
+        self.assertFalse(self.fail_board.has_unique_solution(solver))
+
 
 class Part3Test(TestUtil):
     def setUp(self) -> None:
@@ -715,5 +748,653 @@ class Part5Test(TestUtil):
             self.assertTrue(len(sub.extensions()) == 9)
 
 
+class SolverEngineTest(TestUtil):
+    def setUp(self) -> None:
+        # a long chain 0 -> 1 -> ... -> n, with a dead-end branch at each node
+        self.n = 5000
+        self.chain = {i: [-i - 1, i + 1] for i in range(self.n)}
+        self.chain.update({-i - 1: [] for i in range(self.n)})
+        self.chain[self.n] = []
+
+    def tearDown(self) -> None:
+        pass
+
+    def test_dfs_deeper_than_recursion_limit(self):
+        puzzle = DummyPuzzle(self.chain, 0, self.n)
+        res = DfsSolver().solve(puzzle)
+        self.assertEqual(self.n + 1, len(res))
+        self.assertEqual(list(range(self.n + 1)), [p.start for p in res])
+
+    def test_dfs_records_dead_ends_in_seen(self):
+        graph = {0: [1, 2], 1: [3], 2: [3], 3: []}
+        seen = set()
+        res = DfsSolver().solve(DummyPuzzle(graph, 0, 4), seen)
+        self.assertEqual([], res)
+        self.assertEqual({'(0 -> 4)', '(1 -> 4)', '(2 -> 4)', '(3 -> 4)'},
+                         seen)
+
+    def test_dfs_fail_fast_child_added_to_seen(self):
+        graph = {0: [1, 2], 1: [3], 2: [3], 3: []}
+        seen = set()
+        res = DfsSolver().solve(DummyPuzzle(graph, 0, 3, [1]), seen)
+        self.assertEqual([0, 2, 3], [p.start for p in res])
+        self.assertIn('(1 -> 3)', seen)
+
+    def test_bfs_returns_shortest_path_on_long_chain(self):
+        graph = dict(self.chain)
+        graph[0] = [-1, 1, self.n - 1]
+        res = BfsSolver().solve(DummyPuzzle(graph, 0, self.n))
+        self.assertEqual([0, self.n - 1, self.n], [p.start for p in res])
+
+    def test_bfs_does_not_record_fail_fast_states(self):
+        graph = {0: [1, 2], 1: [3], 2: [3], 3: []}
+        seen = set()
+        res = BfsSolver().solve(DummyPuzzle(graph, 0, 3, [1]), seen)
+        self.assertEqual([0, 2, 3], [p.start for p in res])
+        self.assertNotIn('(1 -> 3)', seen)
+
+    def test_solvers_key_states_without_str(self):
+        class NoStrPuzzle(DummyPuzzle):
+            def __str__(self):
+                raise AssertionError('str() should not be needed')
+
+            def extensions(self):
+                return [NoStrPuzzle(self.graph, n, self.end)
+                        for n in self.graph[self.start]]
+
+        graph = {0: [1, 2], 1: [3], 2: [3], 3: []}
+        for solver in [DfsSolver(), BfsSolver()]:
+            res = solver.solve(NoStrPuzzle(graph, 0, 3))
+            self.assertEqual(3, len(res))
+
+    def test_state_keys_match_string_equality(self):
+        word_set = {'aaa', 'aba', 'abc', 'aca', 'acc'}
+        ladder = WordLadderPuzzle('aaa', 'abc', word_set)
+        exts = ladder.extensions()
+        self.assertEqual(len({str(p) for p in exts}),
+                         len({p.state_key() for p in exts}))
+        sudoku = SudokuPuzzle(4, [[EMPTY_CELL] * 4 for _ in range(4)],
+                              {'1', '2', '3', '4'})
+        exts = sudoku.extensions()
+        self.assertEqual(4, len({p.state_key() for p in exts}))
+
+    def test_astar_finds_shortest_ladder(self):
+        word_set = {'a', 'b', 'c', 'aa', 'ab', 'ac', 'ba', 'bb',
+                    'bc', 'ca', 'cb', 'cc', 'aaa',
+                    'aba', 'abc',
+                    'aca', 'acb', 'acc'}
+        ladder = WordLadderPuzzle('aaa', 'abc', word_set)
+        res = AStarSolver().solve(ladder)
+        self.assertEqual([ladder, WordLadderPuzzle('aba', 'abc', word_set),
+                          WordLadderPuzzle('abc', 'abc', word_set)], res)
+        res = AStarSolver().solve(ladder, {str(res[1])})
+        self.assertEqual(4, len(res))
+        self.assertTrue(res[-1].is_solved())
+
+    def test_astar_is_optimal_where_greedy_is_not(self):
+        # 0 -> 1 -> 3 is shortest, but the heuristic makes 2 look closer
+        graph = {0: [1, 2], 1: [3], 2: [4], 4: [3], 3: []}
+        estimates = {0: 1, 1: 1, 2: 0, 4: 0, 3: 0}
+        puzzle = DummyPuzzle(graph, 0, 3, heuristic=lambda s, e: estimates[s])
+        res = AStarSolver().solve(puzzle)
+        self.assertEqual([0, 1, 3], [p.start for p in res])
+        res = AStarSolver(greedy=True).solve(puzzle)
+        self.assertEqual([0, 2, 4, 3], [p.start for p in res])
+
+    def test_astar_unsolvable(self):
+        graph = {0: [1], 1: [0]}
+        self.assertEqual([], AStarSolver().solve(DummyPuzzle(graph, 0, 2)))
+
+    def test_iterative_deepening_finds_shortest_path(self):
+        graph = {0: [1, 2], 1: [3], 3: [5], 2: [4, 0], 4: [6], 5: [6], 6: []}
+        for solver in [IDAStarSolver(), IDAStarSolver(table_size=2),
+                       IterativeDeepeningSolver()]:
+            res = solver.solve(DummyPuzzle(graph, 0, 6))
+            self.assertEqual([0, 2, 4, 6], [p.start for p in res])
+            seen = {'(4 -> 6)'}
+            res = solver.solve(DummyPuzzle(graph, 0, 6), seen)
+            self.assertEqual([0, 1, 3, 5, 6], [p.start for p in res])
+            self.assertIn('(5 -> 6)', seen)
+            self.assertEqual([], solver.solve(DummyPuzzle(graph, 0, 7)))
+
+    def test_ida_get_difficulty(self):
+        word_set = {'aaa', 'aba', 'abc', 'aca', 'acc'}
+        ladder = WordLadderPuzzle('aaa', 'abc', word_set)
+        self.assertEqual(EASY, ladder.get_difficulty(IDAStarSolver()))
+        self.assertEqual(EASY, ladder.get_difficulty(
+            IterativeDeepeningSolver()))
+
+    def test_bidirectional_bfs_matches_one_sided_lengths(self):
+        word_set = {'a', 'b', 'c', 'aa', 'ab', 'ac', 'ba', 'bb',
+                    'bc', 'ca', 'cb', 'cc', 'aaa', 'aba', 'abc',
+                    'aca', 'acb', 'acc', 'bbb', 'bbc', 'cbc'}
+        words = sorted(w for w in word_set if len(w) == 3)
+        for from_word in words:
+            for to_word in words:
+                ladder = WordLadderPuzzle(from_word, to_word, word_set)
+                one_sided = BfsSolver(bidirectional=False).solve(ladder)
+                both = BfsSolver().solve(ladder)
+                self.assertEqual(len(one_sided), len(both))
+                if both:
+                    self.assertEqual(ladder, both[0])
+                    self.assertTrue(both[-1].is_solved())
+                    for i in range(len(both) - 1):
+                        self.assertIn(both[i + 1], both[i].extensions())
+
+    def test_dfs_builds_extensions_lazily(self):
+        built = []
+
+        class CountingPuzzle(DummyPuzzle):
+            def iter_extensions(self):
+                for n in self.graph[self.start]:
+                    built.append(n)
+                    yield CountingPuzzle(self.graph, n, self.end)
+
+        graph = {0: [1, 2, 3], 1: [4], 2: [], 3: [], 4: []}
+        res = DfsSolver().solve(CountingPuzzle(graph, 0, 4))
+        self.assertEqual([0, 1, 4], [p.start for p in res])
+        self.assertEqual([1, 4], built)
+
+    def test_overridden_extensions_are_used(self):
+        class ReversedPuzzle(DummyPuzzle):
+            def extensions(self):
+                return [ReversedPuzzle(self.graph, n, self.end)
+                        for n in reversed(self.graph[self.start])]
+
+        graph = {0: [1, 2], 1: [3], 2: [3], 3: []}
+        res = DfsSolver().solve(ReversedPuzzle(graph, 0, 3))
+        self.assertEqual([0, 2, 3], [p.start for p in res])
+
+    def test_node_limit_returns_budget_exceeded(self):
+        puzzle = DummyPuzzle(self.chain, 0, self.n)
+        for solver in [DfsSolver(budget=Budget(max_nodes=10)),
+                       BfsSolver(budget=Budget(max_nodes=10)),
+                       AStarSolver(budget=Budget(max_nodes=10)),
+                       IDAStarSolver(budget=Budget(max_nodes=10))]:
+            res = solver.solve(puzzle)
+            self.assertEqual([], res)
+            self.assertTrue(res.budget_exceeded())
+            self.assertEqual(NODE_LIMIT, res.exceeded)
+            self.assertEqual(11, res.stats.nodes_expanded)
+
+    def test_unsolvable_within_budget(self):
+        graph = {0: [1], 1: []}
+        res = BfsSolver(budget=Budget(max_nodes=10)).solve(
+            DummyPuzzle(graph, 0, 2))
+        self.assertEqual([], res)
+        self.assertFalse(res.budget_exceeded())
+        self.assertEqual(2, res.stats.seen_size)
+
+    def test_seen_and_time_limits(self):
+        puzzle = DummyPuzzle(self.chain, 0, self.n)
+        res = BfsSolver(budget=Budget(max_seen=100)).solve(puzzle)
+        self.assertEqual(SEEN_LIMIT, res.exceeded)
+        res = DfsSolver(budget=Budget(time_limit=0)).solve(puzzle)
+        self.assertEqual(TIME_LIMIT, res.exceeded)
+
+    def test_cancelled_search(self):
+        token = CancellationToken()
+        token.cancel()
+        solver = DfsSolver(budget=Budget(token=token))
+        puzzle = DummyPuzzle(self.chain, 0, self.n)
+        self.assertEqual(CANCELLED, solver.solve(puzzle).exceeded)
+        self.assertRaises(BudgetExceeded, solver.count_solutions, puzzle)
+        token.reset()
+        self.assertEqual(self.n + 1, len(solver.solve(puzzle)))
+
+    def test_profiled_stats(self):
+        graph = {0: [1, 2], 1: [3], 2: [0, 4], 3: [], 4: []}
+        solver = BfsSolver(profile=True)
+        res = solver.solve(DummyPuzzle(graph, 0, 4, [1]))
+        self.assertEqual([0, 2, 4], [p.start for p in res])
+        self.assertIs(res.stats, solver.stats)
+        stats = solver.stats.as_dict()
+        self.assertEqual(2, stats['nodes_expanded'])
+        self.assertEqual(4, stats['nodes_generated'])
+        self.assertEqual(1, stats['fail_fast_pruned'])
+        self.assertEqual(1, stats['duplicates_pruned'])
+        self.assertEqual(1, stats['max_depth'])
+        self.assertEqual(3, stats['seen_size'])
+        self.assertEqual(stats, json.loads(solver.stats.to_json()))
+
+    def test_stats_without_profiling(self):
+        graph = {0: [1, 2], 1: [3], 2: [3], 3: []}
+        solver = DfsSolver()
+        self.assertEqual(1, solver.count_solutions(DummyPuzzle(graph, 0, 3)))
+        self.assertEqual(3, solver.stats.nodes_expanded)
+        self.assertEqual(4, solver.stats.seen_size)
+        self.assertEqual(0, solver.stats.nodes_generated)
+
+    def test_hooks_see_search_events(self):
+        events = []
+
+        class RecordingHook(SearchHook):
+            def on_expand(self, puzzle, depth):
+                events.append(('expand', puzzle.start, depth))
+
+            def on_prune(self, key, reason):
+                events.append(('prune', reason))
+
+            def on_goal(self, path):
+                events.append(('goal', [p.start for p in path]))
+
+        graph = {0: [1, 2], 1: [0], 2: [3, 4], 3: [], 4: []}
+        solver = DfsSolver()
+        solver.add_hook(RecordingHook())
+        solver.solve(DummyPuzzle(graph, 0, 4, [3]))
+        self.assertEqual([('expand', 0, 0), ('expand', 1, 1),
+                          ('prune', ALREADY_SEEN), ('expand', 2, 1),
+                          ('prune', FAILED_FAST), ('goal', [0, 2, 4])],
+                         events)
+
+    def test_json_trace_hook(self):
+        trace = io.StringIO()
+        solver = BfsSolver(budget=Budget(max_nodes=1))
+        solver.add_hook(JsonTraceHook(trace))
+        res = solver.solve(DummyPuzzle(self.chain, 0, self.n))
+        self.assertTrue(res.budget_exceeded())
+        events = [json.loads(line) for line in trace.getvalue().splitlines()]
+        self.assertEqual(['expand', 'prune'],
+                         [event['event'] for event in events])
+        self.assertEqual(NODE_LIMIT, events[-1]['reason'])
+
+    def test_portfolio_solver(self):
+        with PortfolioSolver() as solver:
+            res = solver.solve(DummyPuzzle(self.chain, 0, self.n))
+            self.assertEqual(list(range(self.n + 1)), [p.start for p in res])
+            self.assertIn(solver.winner, solver.strategies)
+            res = solver.solve(DummyPuzzle({0: [1], 1: []}, 0, 2))
+            self.assertEqual([], res)
+            self.assertFalse(res.budget_exceeded())
+
+    def test_portfolio_solver_budget(self):
+        strategies = [DfsSolver(), BfsSolver(bidirectional=False)]
+        with PortfolioSolver(strategies, Budget(max_nodes=10)) as solver:
+            res = solver.solve(DummyPuzzle(self.chain, 0, self.n))
+            self.assertEqual([], res)
+            self.assertEqual(NODE_LIMIT, res.exceeded)
+            self.assertIsNone(solver.winner)
+
+    def test_parallel_dfs_solver(self):
+        empty = SudokuPuzzle(4, [[" "] * 4 for _ in range(4)],
+                             {"1", "2", "3", "4"})
+        with ParallelDfsSolver(workers=2) as solver:
+            self.assertEqual(288, solver.count_solutions(empty))
+            self.assertEqual(2, solver.count_solutions(empty, 2))
+            self.assertFalse(empty.has_unique_solution(solver))
+            res = solver.solve(empty)
+            self.assertEqual(empty, res[0])
+            self.assertTrue(res[-1].is_solved())
+            for i in range(len(res) - 1):
+                self.assertIn(res[i + 1], res[i].extensions())
+        with ParallelDfsSolver(split_depth=3, workers=2) as solver:
+            res = solver.solve(DummyPuzzle(self.chain, 0, self.n))
+            self.assertEqual(list(range(self.n + 1)), [p.start for p in res])
+
+    def test_parallel_bfs_solver(self):
+        word_set = {'aaa', 'aab', 'abb', 'bbb', 'bba', 'aba', 'acc', 'ccc'}
+        with ParallelBfsSolver(workers=3) as solver:
+            for from_word, to_word in [('aaa', 'bbb'), ('aaa', 'ccc'),
+                                       ('bba', 'acc'), ('aaa', 'aaa')]:
+                ladder = WordLadderPuzzle(from_word, to_word, word_set)
+                res = solver.solve(ladder)
+                expected = BfsSolver(bidirectional=False).solve(ladder)
+                self.assertEqual(len(expected), len(res))
+                if res:
+                    self.assertEqual(ladder, res[0])
+                    self.assertTrue(res[-1].is_solved())
+                for i in range(len(res) - 1):
+                    self.assertIn(res[i + 1], res[i].extensions())
+            graph = {0: [1, 2], 1: [3], 2: [3], 3: []}
+            self.assertEqual([], solver.solve(DummyPuzzle(graph, 0, 3),
+                                              {'(1 -> 3)', '(2 -> 3)'}))
+
+    def test_solve_many(self):
+        word_set = {'aaa', 'aab', 'abb', 'bbb', 'bba', 'aba', 'acc', 'ccc'}
+        puzzles = [WordLadderPuzzle(word, 'bbb', word_set)
+                   for word in sorted(word_set)]
+        results = list(solve_many(iter(puzzles), BfsSolver(), workers=2,
+                                  chunksize=3, window=1))
+        self.assertEqual(list(range(len(puzzles))),
+                         sorted(index for index, _, _ in results))
+        for index, path, stats in results:
+            expected = BfsSolver().solve(puzzles[index])
+            self.assertEqual(len(expected), len(path))
+            self.assertIs(path.stats, stats)
+            if path:
+                self.assertEqual(puzzles[index], path[0])
+                self.assertIs(word_set, path[-1].word_set)
+
+    def test_caching_solver(self):
+        word_set = {'aaa', 'aab', 'abb', 'bbb'}
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'cache.db')
+            cache = ResultCache(filename)
+            solver = CachingSolver(BfsSolver(), cache)
+            ladder = WordLadderPuzzle('aaa', 'bbb', word_set)
+            expected = BfsSolver().solve(ladder)
+            self.assertEqual(expected, solver.solve(ladder))
+            self.assertEqual(expected, solver.solve(ladder))
+            self.assertEqual((1, 1), (cache.hits, cache.misses))
+            cache.close()
+
+            cache = ResultCache(filename)
+            solver = CachingSolver(BfsSolver(), cache)
+            res = solver.solve(WordLadderPuzzle('aaa', 'bbb', set(word_set)))
+            self.assertEqual(expected, res)
+            self.assertEqual(1, cache.disk_hits)
+            changed = WordLadderPuzzle('aaa', 'bbb', word_set | {'bab'})
+            self.assertIsNone(cache.get(solver.solver, changed))
+            cache.invalidate(ladder.cache_context())
+            self.assertIsNone(cache.get(solver.solver, ladder))
+            cache.close()
+
+    def test_caching_solver_unsolvable(self):
+        graph = {0: [1], 1: []}
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'cache.db')
+            cache = ResultCache(filename)
+            solver = CachingSolver(BfsSolver(), cache)
+            self.assertEqual([], solver.solve(DummyPuzzle(graph, 0, 5)))
+            self.assertEqual([], solver.solve(DummyPuzzle(graph, 0, 5)))
+            self.assertEqual(1, cache.hits)
+            cache.close()
+
+            cache = ResultCache(filename)
+            solver = CachingSolver(BfsSolver(), cache)
+            self.assertEqual([], solver.solve(DummyPuzzle(graph, 0, 5)))
+            self.assertEqual(1, cache.disk_hits)
+            self.assertEqual([], solver.solve(DummyPuzzle(graph, 0, 5)))
+            cache.close()
+        ladder = WordLadderPuzzle('aaa', 'bbb', {'aaa', 'bbb'})
+        solver = CachingSolver(BfsSolver(), ResultCache())
+        self.assertEqual(IMPOSSIBLE, ladder.get_difficulty(solver))
+        self.assertEqual(IMPOSSIBLE, ladder.get_difficulty(solver))
+
+    def test_result_cache_keys_solver_settings(self):
+        cache = ResultCache()
+        graph = {0: [1, 2], 1: [3], 2: [4], 3: [], 4: [5], 5: []}
+        narrow = CachingSolver(BeamSolver(1), cache)
+        wide = CachingSolver(BeamSolver(2), cache)
+        self.assertEqual([], narrow.solve(DummyPuzzle(graph, 0, 5)))
+        self.assertEqual([0, 2, 4, 5], [p.start for p in
+                                        wide.solve(DummyPuzzle(graph, 0, 5))])
+        self.assertEqual(0, cache.hits)
+        graph = {0: [1, 2], 1: [3], 2: [4], 4: [3], 3: []}
+        estimates = {0: 1, 1: 1, 2: 0, 4: 0, 3: 0}
+        puzzle = DummyPuzzle(graph, 0, 3, heuristic=lambda s, e: estimates[s])
+        greedy = CachingSolver(AStarSolver(greedy=True), cache)
+        self.assertEqual(4, len(greedy.solve(puzzle)))
+        self.assertEqual(3, len(CachingSolver(AStarSolver(),
+                                              cache).solve(puzzle)))
+        self.assertEqual(4, len(greedy.solve(puzzle)))
+        self.assertEqual(1, cache.hits)
+
+    def test_caching_solver_word_set_changed_in_place(self):
+        word_set = {'aaa', 'aab', 'abb', 'bbb'}
+        ladder = WordLadderPuzzle('aaa', 'bbb', word_set)
+        solver = CachingSolver(BfsSolver(), ResultCache())
+        self.assertEqual(4, len(solver.solve(ladder)))
+        word_set.remove('abb')
+        word_set.add('ccc')
+        self.assertEqual([], solver.solve(ladder))
+        self.assertEqual(0, solver.cache.hits)
+
+    def test_result_cache_eviction(self):
+        cache = ResultCache(max_entries=2)
+        solver = DfsSolver()
+        graph = {0: [1], 1: [2], 2: [3], 3: []}
+        puzzles = [DummyPuzzle(graph, start, 3) for start in range(3)]
+        for puzzle in puzzles:
+            cache.put(solver, puzzle, solver.solve(puzzle))
+        self.assertEqual(1, cache.evictions)
+        self.assertIsNone(cache.get(solver, puzzles[0]))
+        self.assertEqual([1, 2, 3],
+                         [p.start for p in cache.get(solver, puzzles[1])])
+
+    def test_result_cache_disk_eviction(self):
+        solver = DfsSolver()
+        graph = {0: [9], 1: [9], 2: [9], 9: []}
+        puzzles = [DummyPuzzle(graph, start, 9) for start in range(3)]
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'cache.db')
+            cache = ResultCache(filename, max_entries=1, max_disk_bytes=350)
+            for puzzle in puzzles[:2]:
+                cache.put(solver, puzzle, solver.solve(puzzle))
+            self.assertEqual(2, len(cache.get(solver, puzzles[0])))
+            self.assertEqual(1, cache.disk_hits)
+            cache.put(solver, puzzles[2], solver.solve(puzzles[2]))
+            cache.close()
+
+            cache = ResultCache(filename, max_entries=1, max_disk_bytes=350)
+            self.assertIsNone(cache.get(solver, puzzles[1]))
+            self.assertEqual(2, len(cache.get(solver, puzzles[0])))
+            self.assertEqual(2, len(cache.get(solver, puzzles[2])))
+            cache.close()
+
+    def test_dead_state_memo(self):
+        memo = DeadStateMemo()
+        solver = DfsSolver(dead_states=memo)
+        graph = {0: [1, 2], 1: [3], 2: [4], 3: [], 4: []}
+        self.assertEqual([0, 2, 4], [p.start for p in
+                                     solver.solve(DummyPuzzle(graph, 0, 4))])
+        self.assertEqual(2, len(memo))
+        self.assertEqual(1, solver.count_solutions(DummyPuzzle(graph, 0, 4)))
+        self.assertEqual(1, memo.hits)
+        rows = [["1", " ", " ", " "], [" ", " ", "1", " "],
+                [" ", "1", " ", " "], [" ", " ", " ", " "]]
+        puzzle = SudokuPuzzle(4, rows, {"1", "2", "3", "4"})
+        expected = DfsSolver().count_solutions(puzzle)
+        self.assertEqual(expected, solver.count_solutions(puzzle))
+        self.assertEqual(expected, solver.count_solutions(puzzle))
+
+    def test_dead_state_memo_skips_ancestors(self):
+        # 1 only reaches the solution through its ancestor 0, so it must not
+        # be recorded as dead
+        graph = {0: [1, 3], 1: [0], 3: []}
+        solver = DfsSolver(dead_states=DeadStateMemo())
+        self.assertEqual([0, 3], [p.start for p in
+                                  solver.solve(DummyPuzzle(graph, 0, 3))])
+        self.assertEqual([1, 0, 3], [p.start for p in
+                                     solver.solve(DummyPuzzle(graph, 1, 3))])
+
+    def test_fingerprint_set(self):
+        for bits in (64, 128):
+            seen = FingerprintSet(bits, capacity=2)
+            seen.update(str(i) for i in range(1000))
+            self.assertEqual(1000, len(seen))
+            self.assertTrue(all(str(i) in seen for i in range(1000)))
+            self.assertFalse(any(str(i) in seen for i in range(1000, 2000)))
+        # -1 and -2 have the same hash, but not the same fingerprint
+        seen = FingerprintSet()
+        seen.update([-1, -2])
+        self.assertEqual(2, len(seen))
+        # when every state has the same fingerprint, only exact mode tells
+        # them apart
+        with patch.object(FingerprintSet, '_fingerprint',
+                          lambda self, key: (1,)):
+            seen = FingerprintSet()
+            seen.update([-1, -2])
+            self.assertEqual(1, len(seen))
+            seen = FingerprintSet(exact=True)
+            seen.update([-1, -2])
+            self.assertEqual(2, len(seen))
+            self.assertEqual(1, seen.collisions)
+
+    def test_fingerprint_seen_backend(self):
+        ladder = WordLadderPuzzle("cost", "save", load_words())
+        for solver in [BfsSolver(seen_backend=FingerprintSet),
+                       AStarSolver(seen_backend=FingerprintSet),
+                       DfsSolver(seen_backend=FingerprintSet)]:
+            path = solver.solve(ladder)
+            self.assertTrue(path[-1].is_solved())
+            if not isinstance(solver, DfsSolver):
+                self.assertEqual(len(BfsSolver().solve(ladder)), len(path))
+
+    def test_external_bfs(self):
+        words = load_words()
+        for from_word, to_word in [("cost", "save"), ("same", "cost")]:
+            ladder = WordLadderPuzzle(from_word, to_word, words)
+            path = ExternalBfsSolver(run_size=10).solve(ladder)
+            self.assertEqual(len(BfsSolver().solve(ladder)), len(path))
+            for state, ext in zip(path, path[1:]):
+                self.assertIn(ext, state.extensions())
+        graph = {0: [1, 2], 1: [3], 2: [0, 4], 3: [5], 4: [5], 5: []}
+        solver = ExternalBfsSolver(run_size=1)
+        self.assertEqual([0, 1, 3, 5], [p.start for p in
+                                        solver.solve(DummyPuzzle(graph, 0,
+                                                                 5))])
+        self.assertEqual(5, solver.stored)
+        self.assertEqual([], solver.solve(DummyPuzzle(graph, 0, 6)))
+
+    def test_external_bfs_budget_removes_files(self):
+        ladder = WordLadderPuzzle("cost", "save", load_words())
+        with tempfile.TemporaryDirectory() as directory:
+            solver = ExternalBfsSolver(directory, budget=Budget(max_nodes=30))
+            self.assertEqual(NODE_LIMIT, solver.solve(ladder).exceeded)
+            self.assertEqual([], os.listdir(directory))
+
+    def test_restarting_dfs_solver(self):
+        empty = SudokuPuzzle(9, [[" "] * 9 for _ in range(9)],
+                             {str(i) for i in range(1, 10)})
+        for schedule in (LUBY, GEOMETRIC):
+            solver = RestartingDfsSolver(unit=5, schedule=schedule, seed=3)
+            path = solver.solve(empty)
+            self.assertTrue(path[-1].is_solved())
+            self.assertGreater(solver.restarts, 0)
+            self.assertEqual(path, solver.solve(empty))
+        graph = {0: [1, 2], 1: [3], 2: [4], 3: [], 4: [5], 5: []}
+        solver = RestartingDfsSolver(unit=1)
+        self.assertEqual([0, 2, 4, 5], [p.start for p in
+                                        solver.solve(DummyPuzzle(graph, 0,
+                                                                 5))])
+        # the schedule grows until an attempt searches the whole graph
+        self.assertEqual([], solver.solve(DummyPuzzle(graph, 0, 6)))
+        self.assertGreater(solver.restarts, 0)
+
+    def test_beam_solver(self):
+        ladder = WordLadderPuzzle("same", "cost", load_words())
+        solver = BeamSolver(1)
+        path = solver.solve(ladder)
+        self.assertTrue(path[-1].is_solved())
+        self.assertGreater(len(path), 5)
+        self.assertFalse(solver.optimal)
+        for state, ext in zip(path, path[1:]):
+            self.assertIn(ext, state.extensions())
+        self.assertEqual(5, len(BeamSolver(3).solve(ladder)))
+        # a wide enough beam never drops a state, so it is a full BFS
+        graph = {0: [1, 2], 1: [3], 2: [4], 3: [], 4: [5], 5: []}
+        solver = BeamSolver(2)
+        self.assertEqual([0, 2, 4, 5], [p.start for p in
+                                        solver.solve(DummyPuzzle(graph, 0,
+                                                                 5))])
+        self.assertTrue(solver.optimal)
+        solver = BeamSolver(1)
+        self.assertEqual([], solver.solve(DummyPuzzle(graph, 0, 5)))
+        self.assertFalse(solver.optimal)
+        solver = BeamSolver(2, budget=Budget(max_nodes=1))
+        self.assertEqual(NODE_LIMIT,
+                         solver.solve(DummyPuzzle(graph, 0, 5)).exceeded)
+        self.assertFalse(solver.optimal)
+        solver = BeamSolver(2)
+        self.assertEqual([], solver.solve(DummyPuzzle(graph, 0, 5),
+                                          {'(0 -> 5)'}))
+        self.assertFalse(solver.optimal)
+
+    def test_move_based_search(self):
+        class ExtensionsOnly(SudokuPuzzle):
+            def extensions(self):
+                return SudokuPuzzle.extensions(self)
+
+        for cls in (SudokuPuzzle, ExtensionsOnly):
+            empty = cls(4, [[" "] * 4 for _ in range(4)],
+                        {"1", "2", "3", "4"})
+            key = empty.state_key()
+            self.assertEqual(288, DfsSolver().count_solutions(empty))
+            path = DfsSolver().solve(empty)
+            self.assertEqual(17, len(path))
+            self.assertIs(empty, path[0])
+            for state, ext in zip(path, path[1:]):
+                self.assertIn(ext, state.extensions())
+            self.assertEqual(path, IDAStarSolver().solve(empty))
+            self.assertEqual(key, empty.state_key())
+        ladder = WordLadderPuzzle("cost", "save", load_words())
+        path = IDAStarSolver().solve(ladder)
+        self.assertEqual(5, len(path))
+        self.assertEqual("cost", ladder.from_word)
+        self.assertEqual(["cost", "cast", "case", "cave", "save"],
+                         [state.from_word for state in path])
+
+    def test_adaptive_solver(self):
+        ladder = WordLadderPuzzle("stop", "tops", load_words())
+        expected = len(BfsSolver().solve(ladder))
+        path = AdaptiveSolver().solve(ladder)
+        self.assertEqual(expected, len(path))
+        self.assertEqual(0, path.stats.switches)
+        for max_bytes in (20000, 1):
+            path = AdaptiveSolver(max_bytes).solve(ladder)
+            self.assertEqual(expected, len(path))
+            self.assertEqual(1, path.stats.switches)
+            for state, ext in zip(path, path[1:]):
+                self.assertIn(ext, state.extensions())
+        self.assertEqual(0, path.stats.switch_depth)
+        graph = {0: [1, 2], 1: [3], 2: [4], 3: [], 4: [5], 5: []}
+        self.assertEqual([], AdaptiveSolver(1).solve(DummyPuzzle(graph, 0,
+                                                                 6)))
+
+    def test_adaptive_solver_unsolvable_cycles(self):
+        graph = {0: [1, 2], 1: [3, 0], 2: [3, 0], 3: [4, 1], 4: [5, 3],
+                 5: [4, 2]}
+        res = AdaptiveSolver(1).solve(DummyPuzzle(graph, 0, 9))
+        self.assertEqual([], res)
+        self.assertEqual(1, res.stats.switches)
+        graph[5].append(9)
+        for table_size in (1 << 20, 2, 0):
+            path = AdaptiveSolver(1, table_size).solve(DummyPuzzle(graph, 0,
+                                                                   9))
+            self.assertEqual(6, len(path))
+            self.assertEqual(9, path[-1].start)
+
+    def test_shared_seen_set(self):
+        seen = SharedSeenSet(64, 4)
+        try:
+            self.assertTrue(seen.add_if_absent(('cost', 'save')))
+            self.assertFalse(seen.add_if_absent(('cost', 'save')))
+            seen.update(str(i) for i in range(30))
+            self.assertEqual(31, len(seen))
+            self.assertIn('7', seen)
+            self.assertNotIn('70', seen)
+            self.assertAlmostEqual(31 / 64, seen.load_factor())
+            self.assertGreaterEqual(seen.collisions(), 0)
+            with self.assertRaises(BudgetExceeded):
+                seen.update(str(i) for i in range(100))
+            seen.clear()
+            self.assertEqual(0, len(seen))
+            # a search whose seen set fills up reports the work it did
+            solver = DfsSolver(seen_backend=lambda: seen)
+            res = solver.solve(WordLadderPuzzle("cost", "zzzz", load_words()))
+            self.assertEqual(SEEN_LIMIT, res.exceeded)
+            self.assertGreater(res.stats.nodes_expanded, 0)
+            seen.clear()
+            empty = SudokuPuzzle(4, [[" "] * 4 for _ in range(4)],
+                                 {"1", "2", "3", "4"})
+            with self.assertRaises(BudgetExceeded) as context:
+                solver.count_solutions(empty)
+            self.assertIs(solver.stats, context.exception.stats)
+            self.assertGreater(context.exception.stats.nodes_expanded, 0)
+        finally:
+            seen.close()
+
+    def test_parallel_dfs_shared_seen(self):
+        empty = SudokuPuzzle(4, [[" "] * 4 for _ in range(4)],
+                             {"1", "2", "3", "4"})
+        with ParallelDfsSolver(workers=2, shared_capacity=10000) as solver:
+            self.assertEqual(288, solver.count_solutions(empty))
+            self.assertTrue(solver.solve(empty)[-1].is_solved())
+        with ParallelDfsSolver(workers=2, shared_capacity=16) as solver:
+            ladder = WordLadderPuzzle("cost", "save", load_words())
+            self.assertEqual(SEEN_LIMIT, solver.solve(ladder).exceeded)
+
+
 if __name__ == '__main__':
     unittest.main(exit=False, verbosity=2)
@@ -12,11 +12,14 @@ and Jaisie Sin.
 
 ===== Module Description =====
 
-This module contains list-based implementations of the Stack and Queue
-ADTs. You are NOT required to use either of these in this assignment,
-but we include them for those who wish to do so.
+This module contains implementations of the Stack and Queue ADTs. The stack
+is list-based and the queue is backed by a collections.deque, so that every
+operation on either runs in amortised constant time. You are NOT required to
+use either of these in this assignment, but we include them for those who
+wish to do so.
 """
-from typing import List, Optional, Any
+from collections import deque
+from typing import Any, Deque, Iterable, List, Optional
 
 
 ###############################################################################
@@ -32,12 +35,23 @@ class Stack:
     # _items:
     #     The items stored in this stack. The end of the list represents
     #     the top of the stack.
+    __slots__ = ('_items',)
     _items: List
 
     def __init__(self) -> None:
         """Initialize a new empty stack."""
         self._items = []
 
+    def __len__(self) -> int:
+        """Return the number of items in this stack.
+
+        >>> s = Stack()
+        >>> s.push_many(['a', 'b'])
+        >>> len(s)
+        2
+        """
+        return len(self._items)
+
     def is_empty(self) -> bool:
         """Return whether this stack contains no items.
 
@@ -48,12 +62,26 @@ class Stack:
         >>> s.is_empty()
         False
         """
-        return self._items == []
+        return not self._items
 
     def push(self, item: Any) -> None:
         """Add a new element to the top of this stack."""
         self._items.append(item)
 
+    def push_many(self, items: Iterable) -> None:
+        """Push each element of <items> onto this stack, in order.
+
+        The last element of <items> ends up on the top of this stack.
+
+        >>> s = Stack()
+        >>> s.push_many(['a', 'b', 'c'])
+        >>> s.pop()
+        'c'
+        """
+        self._items.extend(items)
+
+    extend = push_many
+
     def pop(self) -> Any:
         """Remove and return the element at the top of this stack.
 
@@ -89,12 +117,24 @@ class Queue:
     queue, the most recently-added item is the one that is removed.
     """
     # === Private attributes ===
-    # _items: a list of the items in this queue
-    _items: List
+    # _items: the items in this queue. The left end of the deque represents
+    #     the front of the queue.
+    __slots__ = ('_items',)
+    _items: Deque
 
     def __init__(self) -> None:
         """Initialize a new empty queue."""
-        self._items = []
+        self._items = deque()
+
+    def __len__(self) -> int:
+        """Return the number of items in this queue.
+
+        >>> q = Queue()
+        >>> q.enqueue_many(['a', 'b'])
+        >>> len(q)
+        2
+        """
+        return len(self._items)
 
     def is_empty(self) -> bool:
         """Return whether this queue contains no items.
@@ -106,13 +146,25 @@ class Queue:
         >>> q.is_empty()
         False
         """
-        return self._items == []
+        return not self._items
 
     def enqueue(self, item: Any) -> None:
         """Add <item> to the back of this queue.
         """
         self._items.append(item)
 
+    def enqueue_many(self, items: Iterable) -> None:
+        """Add each element of <items> to the back of this queue, in order.
+
+        >>> q = Queue()
+        >>> q.enqueue_many(['a', 'b', 'c'])
+        >>> q.dequeue()
+        'a'
+        """
+        self._items.extend(items)
+
+    extend = enqueue_many
+
     def dequeue(self) -> Optional[Any]:
         """Remove and return the item at the front of this queue.
 
@@ -128,4 +180,4 @@ class Queue:
         if self.is_empty():
             return None
         else:
-            return self._items.pop(0)
+            return self._items.popleft()
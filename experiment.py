@@ -34,7 +34,7 @@ Things you might explore:
 - implementing your own custom solver to try to get better performance
 """
 from timeit import timeit
-from solver import BfsSolver, DfsSolver
+from solver import AStarSolver, BfsSolver, DfsSolver
 from sudoku_puzzle import SudokuPuzzle
 from word_ladder_puzzle import WordLadderPuzzle
 
@@ -64,7 +64,7 @@ if __name__ == '__main__':
     print("|".join(["-" * len(header) for header in headers]))
 
     for puzzle in puzzles:
-        for solver in [DfsSolver, BfsSolver]:
+        for solver in [DfsSolver, BfsSolver, AStarSolver]:
             puzzle_solver = solver()
             sol = puzzle_solver.solve(puzzle)
             n_samples = 1
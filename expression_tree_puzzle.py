@@ -22,7 +22,7 @@ This module contains the ExpressionTreePuzzle class.
 
 from __future__ import annotations
 
-from typing import List, Dict
+from typing import Iterator, List, Dict, Tuple
 
 from expression_tree import ExprTree
 from puzzle import Puzzle
@@ -118,6 +118,49 @@ class ExpressionTreePuzzle(Puzzle):
         """
         return f'{self.variables}\n{str(self._tree)} = {self.target}'
 
+    def state_key(self) -> Tuple[Tuple[str, int], ...]:
+        """
+        Return the variable assignments of this ExpressionTreePuzzle as a
+        tuple of (name, value) pairs.
+
+        The tree and target are not part of the key, since every extension
+        of a puzzle shares them.
+
+        >>> exp_t = ExprTree('+', [ExprTree('a', []), ExprTree('b', [])])
+        >>> puz = ExpressionTreePuzzle(exp_t, 7)
+        >>> puz.variables['b'] = 3
+        >>> puz.state_key()
+        (('a', 0), ('b', 3))
+        """
+        return tuple(self.variables.items())
+
+    def cache_context(self) -> str:
+        """
+        Return the expression and target of this ExpressionTreePuzzle, which
+        its state_key leaves out.
+
+        >>> exp_t = ExprTree('+', [ExprTree('a', []), ExprTree('b', [])])
+        >>> ExpressionTreePuzzle(exp_t, 7).cache_context()
+        '(a + b) = 7'
+        """
+        return f'{self._tree} = {self.target}'
+
+    def heuristic(self) -> int:
+        """
+        Return the number of unassigned variables in this
+        ExpressionTreePuzzle.
+
+        Every move assigns exactly one variable, so this is the exact number
+        of moves to any solution.
+
+        >>> exp_t = ExprTree('+', [ExprTree('a', []), ExprTree('b', [])])
+        >>> puz = ExpressionTreePuzzle(exp_t, 7)
+        >>> puz.variables['a'] = 5
+        >>> puz.heuristic()
+        1
+        """
+        return sum(val == 0 for val in self.variables.values())
+
     # TO DO (Task 5) override extensions
     def extensions(self) -> List[ExpressionTreePuzzle]:
         """
@@ -146,9 +189,23 @@ class ExpressionTreePuzzle(Puzzle):
         >>> len(exts_of_puz) == 18
         True
         """
-        lst = []
+        return list(self.iter_extensions())
+
+    def iter_extensions(self) -> Iterator[ExpressionTreePuzzle]:
+        """
+        Return an iterator over the legal extensions of this
+        ExpressionTreePuzzle, in the same order as extensions.
+
+        The tree and variables are only copied for an extension when it is
+        reached.
+
+        >>> exp_t = ExprTree('+', [ExprTree('a', []), ExprTree('b', [])])
+        >>> puz = ExpressionTreePuzzle(exp_t, 8)
+        >>> next(puz.iter_extensions()).variables
+        {'a': 1, 'b': 0}
+        """
         if self.is_solved() or self._tree.is_empty():
-            return []
+            return
         for k in self.variables:
             # check if var is unassigned (has value of 0)
             if self.variables[k] == 0:
@@ -159,8 +216,53 @@ class ExpressionTreePuzzle(Puzzle):
                     variables[k] = i
                     temp_exptp = ExpressionTreePuzzle(tree, self.target)
                     temp_exptp.variables = variables
-                    lst.append(temp_exptp)
-        return lst
+                    yield temp_exptp
+
+    def moves(self) -> List[Tuple[str, int]]:
+        """
+        Return the moves that give the legal extensions of this
+        ExpressionTreePuzzle, in the same order as extensions: each is an
+        unassigned variable and the value it is assigned.
+
+        >>> exp_t = ExprTree('+', [ExprTree('a', []), ExprTree('b', [])])
+        >>> puz = ExpressionTreePuzzle(exp_t, 8)
+        >>> puz.moves()[:2]
+        [('a', 1), ('a', 2)]
+        """
+        if self.is_solved() or self._tree.is_empty():
+            return []
+        return [(k, i) for k in self.variables if self.variables[k] == 0
+                for i in range(1, 10)]
+
+    def apply(self, move: Tuple[str, int]) -> None:
+        """
+        Assign the variable of <move> its value.
+
+        >>> exp_t = ExprTree('+', [ExprTree('a', []), ExprTree('b', [])])
+        >>> puz = ExpressionTreePuzzle(exp_t, 8)
+        >>> puz.apply(('b', 3))
+        >>> puz.variables
+        {'a': 0, 'b': 3}
+        >>> puz.undo(('b', 3))
+        >>> puz.variables
+        {'a': 0, 'b': 0}
+        """
+        self.variables[move[0]] = move[1]
+
+    def undo(self, move: Tuple[str, int]) -> None:
+        """
+        Unassign the variable assigned by <move>.
+        """
+        self.variables[move[0]] = 0
+
+    def snapshot(self) -> ExpressionTreePuzzle:
+        """
+        Return a new ExpressionTreePuzzle with copies of this puzzle's tree
+        and variables, as in extensions.
+        """
+        puzzle = ExpressionTreePuzzle(self._tree.copy(), self.target)
+        puzzle.variables = self.variables.copy()
+        return puzzle
 
     # TO DO (TASK 5): override fail_fast
     # The specifics of how you implement this are up to you.
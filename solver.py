@@ -17,150 +17,4044 @@ Copyright (c) 2021 Diane Horton, Jonathan Calver, Sophia Huynh,
 
 === Module Description ===
 
-This module contains the abstract Solver class and its two subclasses, which
+This module contains the abstract Solver class and its subclasses, which
 find solutions to puzzles, step by step.
+
+Any solver can be given a Budget, limiting the time, number of expanded
+states and size of the seen set of each search, and carrying a
+CancellationToken that stops a running search. A search that runs out of
+budget returns an empty SolveResult that records why it stopped.
+
+Statistics about each search are kept in a SearchStats, and SearchHooks can
+be added to a solver to observe its searches as they run.
+
+For very large searches, a solver can keep its seen states in a
+FingerprintSet, which stores a small fingerprint of each state instead of
+its key, and ExternalBfsSolver keeps the layers of its search on disk.
+
+PortfolioSolver races several solvers against each other in worker
+processes, returning the first path found, while ParallelDfsSolver and
+ParallelBfsSolver split a single search between worker processes. The
+workers of a ParallelDfsSolver can share their seen states in a
+SharedSeenSet, held in shared memory.
+solve_many solves a batch of puzzles in worker processes.
+
+CachingSolver keeps the results of another solver in a ResultCache, in
+memory and optionally on disk.
 """
 
-from __future__ import annotations
+from __future__ import annotations
+
+import io
+import json
+import os
+import pickle
+import sqlite3
+from array import array
+from collections import OrderedDict, deque
+from copy import copy
+from concurrent.futures import (FIRST_COMPLETED, Future, ProcessPoolExecutor,
+                                wait)
+from hashlib import blake2b
+from heapq import heappop, heappush, heapreplace, merge
+from itertools import chain, count, islice
+from multiprocessing import (Event as ProcessEvent, Lock as ProcessLock,
+                             Process, Queue, resource_tracker)
+from multiprocessing.shared_memory import SharedMemory
+from operator import itemgetter, methodcaller
+from random import Random
+from shutil import rmtree
+from struct import Struct, unpack
+from sys import getsizeof
+from tempfile import mkdtemp
+from threading import Event
+from time import monotonic, perf_counter, time
+from typing import (Callable, Dict, Hashable, Iterable, Iterator, List,
+                    Optional, Set, TextIO, Tuple, Union)
+from zlib import crc32
+
+from puzzle import Puzzle
+
+__all__ = ['TIME_LIMIT', 'NODE_LIMIT', 'SEEN_LIMIT', 'CANCELLED', 'LUBY',
+           'GEOMETRIC', 'ALREADY_SEEN', 'FAILED_FAST', 'CancellationToken',
+           'Budget', 'SearchStats', 'BudgetExceeded', 'SolveResult',
+           'DeadStateMemo', 'FingerprintSet', 'SharedSeenSet', 'SearchHook',
+           'JsonTraceHook', 'Solver', 'DfsSolver', 'RestartingDfsSolver',
+           'BfsSolver', 'AStarSolver', 'IDAStarSolver',
+           'IterativeDeepeningSolver', 'BeamSolver', 'AdaptiveSolver',
+           'ExternalBfsSolver', 'ResultCache', 'CachingSolver',
+           'PortfolioSolver', 'ParallelDfsSolver', 'ParallelBfsSolver',
+           'solve_many']
+
+# reasons for a search to stop before running to completion
+TIME_LIMIT = 'time limit'
+NODE_LIMIT = 'node limit'
+SEEN_LIMIT = 'seen limit'
+CANCELLED = 'cancelled'
+
+# restart schedules of a RestartingDfsSolver
+LUBY = 'luby'
+GEOMETRIC = 'geometric'
+
+# reasons, besides running out of budget, for a search to prune a state
+ALREADY_SEEN = 'already seen'
+FAILED_FAST = 'failed fast'
+
+
+class CancellationToken:
+    """
+    A flag that asks any search whose Budget carries it to stop.
+
+    The token may be cancelled from another thread (for example, a GUI
+    thread) while a search is running. A token made from a
+    multiprocessing.Event may be cancelled from another process.
+
+    === Private Attributes ===
+    _event: set once this token has been cancelled
+    """
+    _event: Event
+
+    def __init__(self, event: Optional[Event] = None) -> None:
+        """
+        Create a new token that is cancelled once <event> is set. If <event>
+        is None, the token has an event of its own, which is not set.
+        """
+        self._event = Event() if event is None else event
+
+    def cancel(self) -> None:
+        """
+        Ask every search using this token to stop.
+        """
+        self._event.set()
+
+    def reset(self) -> None:
+        """
+        Make this token usable for another search.
+        """
+        self._event.clear()
+
+    def is_cancelled(self) -> bool:
+        """
+        Return whether this token has been cancelled.
+
+        >>> token = CancellationToken()
+        >>> token.is_cancelled()
+        False
+        >>> token.cancel()
+        >>> token.is_cancelled()
+        True
+        """
+        return self._event.is_set()
+
+
+class Budget:
+    """
+    Limits on the work a solver may do in a single search.
+
+    === Public Attributes ===
+    time_limit: the number of seconds a search may run for, or None
+    max_nodes: the number of states a search may expand, or None
+    max_seen: the size the set of seen states may grow to, or None
+    token: a token that stops the search once cancelled, or None
+
+    === Representation Invariants ===
+    - time_limit, max_nodes and max_seen are non-negative, if not None
+    """
+    time_limit: Optional[float]
+    max_nodes: Optional[int]
+    max_seen: Optional[int]
+    token: Optional[CancellationToken]
+
+    def __init__(self, time_limit: Optional[float] = None,
+                 max_nodes: Optional[int] = None,
+                 max_seen: Optional[int] = None,
+                 token: Optional[CancellationToken] = None) -> None:
+        """
+        Create a new budget with the given limits; None means no limit.
+        """
+        self.time_limit = time_limit
+        self.max_nodes = max_nodes
+        self.max_seen = max_seen
+        self.token = token
+
+
+class SearchStats:
+    """
+    Statistics about a single search.
+
+    nodes_expanded, seen_size, elapsed and the record of strategy switches
+    are always collected. The other counters and timings are only collected
+    by solvers created with profile=True or that have hooks, and stay at 0
+    otherwise.
+
+    === Public Attributes ===
+    nodes_expanded: the number of states whose extensions were generated
+    seen_size: the size of the set of seen states when the search ended
+    elapsed: the number of seconds the search ran for
+    nodes_generated: the number of extensions generated
+    duplicates_pruned: the number of times a state was skipped because it
+        had already been seen
+    fail_fast_pruned: the number of states skipped because they fail fast
+    peak_frontier: the largest number of states waiting to be expanded
+    max_depth: the depth of the deepest state expanded
+    extensions_time: the number of seconds spent generating extensions
+    fail_fast_time: the number of seconds spent in fail_fast
+    is_solved_time: the number of seconds spent in is_solved
+    state_key_time: the number of seconds spent computing the keys of
+        states (their state_key, or their string representation)
+    switches: the number of times the search switched from one strategy to
+        another (see AdaptiveSolver)
+    switch_depth: the depth of the deepest layer the search had fully
+        explored when it switched strategy, or 0 if it didn't
+    """
+    nodes_expanded: int
+    seen_size: int
+    elapsed: float
+    nodes_generated: int
+    duplicates_pruned: int
+    fail_fast_pruned: int
+    peak_frontier: int
+    max_depth: int
+    extensions_time: float
+    fail_fast_time: float
+    is_solved_time: float
+    state_key_time: float
+    switches: int
+    switch_depth: int
+
+    def __init__(self) -> None:
+        """
+        Create statistics for a search that hasn't started.
+        """
+        self.nodes_expanded = 0
+        self.seen_size = 0
+        self.elapsed = 0.0
+        self.nodes_generated = 0
+        self.duplicates_pruned = 0
+        self.fail_fast_pruned = 0
+        self.peak_frontier = 0
+        self.max_depth = 0
+        self.extensions_time = 0.0
+        self.fail_fast_time = 0.0
+        self.is_solved_time = 0.0
+        self.state_key_time = 0.0
+        self.switches = 0
+        self.switch_depth = 0
+
+    def as_dict(self) -> Dict[str, Union[int, float]]:
+        """
+        Return these statistics as a dictionary mapping each attribute name
+        to its value.
+
+        >>> stats = SearchStats()
+        >>> stats.nodes_expanded = 3
+        >>> stats.as_dict()['nodes_expanded']
+        3
+        """
+        return dict(vars(self))
+
+    def merge(self, other: SearchStats) -> None:
+        """
+        Add the statistics of <other>, a search that was part of this one,
+        to these statistics. Peaks and maximums are combined by taking the
+        larger of the two.
+
+        >>> stats, other = SearchStats(), SearchStats()
+        >>> stats.nodes_expanded, other.nodes_expanded = 3, 4
+        >>> stats.max_depth, other.max_depth = 5, 2
+        >>> stats.merge(other)
+        >>> stats.nodes_expanded, stats.max_depth
+        (7, 5)
+        """
+        for name, value in vars(other).items():
+            if name in ('peak_frontier', 'max_depth', 'switch_depth'):
+                setattr(self, name, max(getattr(self, name), value))
+            else:
+                setattr(self, name, getattr(self, name) + value)
+
+    def to_json(self) -> str:
+        """
+        Return these statistics as a JSON object.
+
+        >>> SearchStats().to_json()[:40]
+        '{"nodes_expanded": 0, "seen_size": 0, "e'
+        """
+        return json.dumps(self.as_dict())
+
+
+class BudgetExceeded(Exception):
+    """
+    Exception raised when a search runs out of budget.
+
+    solve catches this and returns an empty SolveResult instead; it reaches
+    the caller of iter_solutions and count_solutions.
+
+    === Public Attributes ===
+    reason: why the search was stopped (TIME_LIMIT, NODE_LIMIT, SEEN_LIMIT
+        or CANCELLED)
+    stats: statistics about the search up to when it was stopped
+    """
+    reason: str
+    stats: SearchStats
+
+    def __init__(self, reason: str, stats: SearchStats) -> None:
+        """
+        Create a new exception for a search stopped because of <reason>.
+        """
+        Exception.__init__(self, reason, stats)
+        self.reason = reason
+        self.stats = stats
+
+    def __str__(self) -> str:
+        """Return a string representation of this error."""
+        return (f'Search stopped ({self.reason}) after expanding '
+                f'{self.stats.nodes_expanded} states.')
+
+
+class SolveResult(list):
+    """
+    A path returned by a solver's solve method: a list of puzzle states,
+    exactly as described in Solver.solve, that also records how the search
+    ended.
+
+    === Public Attributes ===
+    exceeded: None if the search ran to completion; otherwise, why it was
+        stopped early (TIME_LIMIT, NODE_LIMIT, SEEN_LIMIT or CANCELLED), in
+        which case the list is empty even if the puzzle has a solution
+    stats: statistics about the search
+    """
+    exceeded: Optional[str]
+    stats: SearchStats
+
+    def __init__(self, path: List[Puzzle], exceeded: Optional[str],
+                 stats: SearchStats) -> None:
+        """
+        Create a new result holding <path>.
+        """
+        list.__init__(self, path)
+        self.exceeded = exceeded
+        self.stats = stats
+
+    def budget_exceeded(self) -> bool:
+        """
+        Return whether the search was stopped before it could finish.
+        """
+        return self.exceeded is not None
+
+
+class DeadStateMemo:
+    """
+    A bounded table of the keys of states proven to have no solution, which
+    depth first searches skip. A memo may be shared between searches of
+    related puzzles, such as the puzzles checked for a unique solution while
+    making a sudoku, as long as a state's key alone decides whether it has a
+    solution. When the table is full, the least recently used key is
+    evicted.
+
+    States are recorded by the same key as in the seen states: their
+    state_key, or their string representation when the caller supplies the
+    seen states.
+
+    === Public Attributes ===
+    max_size: the number of keys the table holds at most
+    hits: the number of times a state was found in the table
+    evictions: the number of keys evicted from the table
+
+    === Private Attributes ===
+    _keys: the keys in the table, from least to most recently used
+
+    >>> memo = DeadStateMemo(2)
+    >>> for key in ['a', 'b', 'c']:
+    ...     memo.add(key)
+    >>> 'a' in memo, 'c' in memo, memo.hits, memo.evictions
+    (False, True, 1, 1)
+    """
+    max_size: int
+    hits: int
+    evictions: int
+    _keys: OrderedDict
+
+    def __init__(self, max_size: int = 100000) -> None:
+        """
+        Create a new, empty table holding at most <max_size> keys.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.evictions = 0
+        self._keys = OrderedDict()
+
+    def __contains__(self, key: Hashable) -> bool:
+        """
+        Return whether the state with key <key> is known to be dead.
+        """
+        if key in self._keys:
+            self._keys.move_to_end(key)
+            self.hits += 1
+            return True
+        return False
+
+    def __len__(self) -> int:
+        """
+        Return the number of keys in this table.
+        """
+        return len(self._keys)
+
+    def add(self, key: Hashable) -> None:
+        """
+        Record that the state with key <key> is dead.
+        """
+        self._keys[key] = None
+        if len(self._keys) > self.max_size:
+            self._keys.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Remove every key from this table.
+        """
+        self._keys.clear()
+
+
+def _home(fingerprint: int, mask: int) -> int:
+    """
+    Return the slot (masked by <mask>) at which a search for <fingerprint>
+    begins, using its high bits as well as its low ones.
+    """
+    return (fingerprint ^ fingerprint >> 32) & mask
+
+
+class FingerprintSet:
+    """
+    A set of seen states that stores a fixed-size fingerprint of each
+    state's key, in an open-addressing table, instead of the key itself.
+
+    Fingerprints are BLAKE2 digests of the keys' representations. With 64
+    bits, each state takes about 16 bytes, and with 128 bits about 32, where
+    a set of strings takes hundreds of bytes per sudoku state. Membership
+    tests are slower than for a set.
+
+    Two different states may share a fingerprint, in which case the second
+    is taken to have been seen, so a search may miss a solution or a
+    shortest path. With n states, the chance of that happening at all is
+    about n * n / 2 ** (bits + 1): around 3e-8 for a million states with 64
+    bits, and 3e-2 for a billion; with 128 bits it is negligible (around
+    1e-21 for a billion states). In exact mode the keys are kept as well,
+    which rules out such mistakes (and counts them) but saves no memory.
+
+    === Public Attributes ===
+    bits: the size of each fingerprint, 64 or 128
+    exact: whether the keys are kept to rule out mistaken matches
+    collisions: the number of times a state's fingerprint matched that of
+        a different state, which is only known in exact mode
+
+    === Private Attributes ===
+    _table: the fingerprints, each in bits // 64 consecutive entries, with
+        all zeros marking an empty slot
+    _keys: the key in each slot, in exact mode
+    _capacity: the number of slots in the table, a power of 2
+    _size: the number of states in this set
+
+    >>> seen = FingerprintSet()
+    >>> seen.add('me -> my')
+    >>> 'me -> my' in seen, 'ma -> my' in seen, len(seen)
+    (True, False, 1)
+    """
+    bits: int
+    exact: bool
+    collisions: int
+    _table: array
+    _keys: Optional[List[Hashable]]
+    _capacity: int
+    _size: int
+
+    def __init__(self, bits: int = 64, exact: bool = False,
+                 capacity: int = 1024) -> None:
+        """
+        Create a new, empty set of <bits>-bit fingerprints (64 or 128), which
+        keeps the keys too if <exact>, with room for about <capacity> states
+        before it has to grow.
+
+        Precondition: bits in (64, 128)
+        """
+        self.bits = bits
+        self.exact = exact
+        self.collisions = 0
+        self._size = 0
+        self._allocate(max(8, 1 << (2 * capacity - 1).bit_length()))
+
+    def __contains__(self, key: Hashable) -> bool:
+        """
+        Return whether the state with key <key> is in this set.
+        """
+        return self._find(key, self._fingerprint(key))[1]
+
+    def __len__(self) -> int:
+        """
+        Return the number of states in this set.
+        """
+        return self._size
+
+    def add(self, key: Hashable) -> None:
+        """
+        Add the state with key <key> to this set.
+        """
+        fingerprint = self._fingerprint(key)
+        slot, found = self._find(key, fingerprint)
+        if found:
+            return
+        self._store(slot, key, fingerprint)
+        self._size += 1
+        if 2 * self._size > self._capacity:
+            self._grow()
+
+    def update(self, keys: Iterable[Hashable]) -> None:
+        """
+        Add the state with each key in <keys> to this set.
+        """
+        for key in keys:
+            self.add(key)
+
+    def _fingerprint(self, key: Hashable) -> Tuple[int, ...]:
+        """
+        Return the fingerprint of <key>, as bits // 64 unsigned 64-bit
+        integers that are not all zero.
+        """
+        digest = blake2b(repr(key).encode(),
+                         digest_size=self.bits // 8).digest()
+        if self.bits == 64:
+            return unpack('<Q', digest)[0] or 1,
+        high, low = unpack('<QQ', digest)
+        return high, low or (0 if high else 1)
+
+    def _find(self, key: Hashable,
+              fingerprint: Tuple[int, ...]) -> Tuple[int, bool]:
+        """
+        Return the slot holding the state with key <key> and fingerprint
+        <fingerprint>, and True, or the empty slot it would go in, and
+        False.
+        """
+        table, width = self._table, len(fingerprint)
+        mask = self._capacity - 1
+        slot = _home(fingerprint[-1], mask)
+        while True:
+            start = slot * width
+            stored = tuple(table[start:start + width])
+            if not any(stored):
+                return slot, False
+            if stored == fingerprint:
+                if not self.exact or self._keys[slot] == key:
+                    return slot, True
+                self.collisions += 1
+            slot = (slot + 1) & mask
+
+    def _store(self, slot: int, key: Hashable,
+               fingerprint: Tuple[int, ...]) -> None:
+        """
+        Put the state with key <key> and fingerprint <fingerprint> in the
+        empty slot <slot>.
+        """
+        width = len(fingerprint)
+        self._table[slot * width:(slot + 1) * width] = array('Q', fingerprint)
+        if self.exact:
+            self._keys[slot] = key
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Replace the table with an empty one of <capacity> slots.
+        """
+        self._capacity = capacity
+        self._table = array('Q', bytes(capacity * self.bits // 8))
+        self._keys = [None] * capacity if self.exact else None
+
+    def _grow(self) -> None:
+        """
+        Move every fingerprint into a table with twice as many slots.
+        """
+        table, keys, width = self._table, self._keys, self.bits // 64
+        self._allocate(2 * self._capacity)
+        for slot in range(len(table) // width):
+            fingerprint = tuple(table[slot * width:(slot + 1) * width])
+            if any(fingerprint):
+                key = None if keys is None else keys[slot]
+                self._store(self._find_empty(fingerprint), key, fingerprint)
+
+    def _find_empty(self, fingerprint: Tuple[int, ...]) -> int:
+        """
+        Return the empty slot a state with fingerprint <fingerprint> goes in.
+        """
+        mask = self._capacity - 1
+        slot = _home(fingerprint[-1], mask)
+        width = len(fingerprint)
+        while any(self._table[slot * width:(slot + 1) * width]):
+            slot = (slot + 1) & mask
+        return slot
+
+
+class SharedSeenSet:
+    """
+    A set of seen states, held in shared memory so that the worker
+    processes of a search can all use it, storing a 64-bit fingerprint of
+    each state's key (a BLAKE2 digest of its representation, which is the
+    same in every process) instead of the key itself.
+
+    The set has a fixed capacity, split into stripes, each with its own
+    lock and its own part of the table, in which fingerprints are kept by
+    open addressing. Adding a state holds only its stripe's lock, so workers
+    rarely wait for each other, and add_if_absent tells exactly one of the
+    workers adding the same state that it was the one to add it. Membership
+    tests take no lock, so a state being added at the same moment may be
+    missed, in which case it is searched twice. Mistaken matches between
+    different states are as likely as for a FingerprintSet of 64 bits.
+
+    A search adding a state to a stripe that is full runs out of budget,
+    with SEEN_LIMIT as the reason.
+
+    The set can be handed to worker processes as they are started (as an
+    argument of a Process, or of a pool's initializer), and each attaches to
+    the same shared memory. The process that created the set must close it
+    once it is no longer needed, which frees the shared memory.
+
+    === Public Attributes ===
+    capacity: the number of states the set can hold
+    stripes: the number of stripes the set is split into
+
+    === Private Attributes ===
+    _memory: the shared memory holding the set
+    _counters: for each stripe, the number of states in it and the number
+        of times adding a state found its slot taken by another
+    _slots: the fingerprints, stripe by stripe, with 0 marking an empty slot
+    _locks: the lock of each stripe
+    _owner: whether this process created the set
+
+    >>> seen = SharedSeenSet(64, 4)
+    >>> seen.add_if_absent('me -> my'), seen.add_if_absent('me -> my')
+    (True, False)
+    >>> 'me -> my' in seen, 'ma -> my' in seen, len(seen)
+    (True, False, 1)
+    >>> seen.close()
+    """
+    capacity: int
+    stripes: int
+    _memory: SharedMemory
+    _counters: memoryview
+    _slots: memoryview
+    _locks: List[ProcessLock]
+    _owner: bool
+
+    def __init__(self, capacity: int = 1 << 20, stripes: int = 64) -> None:
+        """
+        Create a new, empty set in shared memory with room for <capacity>
+        states (rounded up to a multiple of <stripes>), split into
+        <stripes> stripes.
+        """
+        self.stripes = stripes
+        self.capacity = -(-capacity // stripes) * stripes
+        self._locks = [ProcessLock() for _ in range(stripes)]
+        self._memory = SharedMemory(create=True,
+                                    size=8 * (2 * stripes + self.capacity))
+        self._owner = True
+        self._view()
+
+    def __getstate__(self) -> Tuple[str, int, int, List[ProcessLock]]:
+        """
+        Return what a worker process needs to attach to this set.
+        """
+        return self._memory.name, self.capacity, self.stripes, self._locks
+
+    def __setstate__(self, state: Tuple[str, int, int,
+                                        List[ProcessLock]]) -> None:
+        """
+        Attach to the set described by <state>, from a worker process.
+        """
+        name, self.capacity, self.stripes, self._locks = state
+        self._memory = SharedMemory(name)
+        # only the process that created the memory may free it, so it isn't
+        # left to this process's resource tracker
+        resource_tracker.unregister(self._memory._name, 'shared_memory')
+        self._owner = False
+        self._view()
+
+    def __contains__(self, key: Hashable) -> bool:
+        """
+        Return whether the state with key <key> is in this set.
+        """
+        fingerprint = _shared_fingerprint(key)
+        start, size = self._segment(fingerprint)
+        slots = self._slots
+        slot = (fingerprint // self.stripes) % size
+        for _ in range(size):
+            stored = slots[start + slot]
+            if stored == fingerprint:
+                return True
+            if not stored:
+                return False
+            slot = (slot + 1) % size
+        return False
+
+    def __len__(self) -> int:
+        """
+        Return the number of states in this set.
+        """
+        return sum(self._counters[0::2])
+
+    def add(self, key: Hashable) -> None:
+        """
+        Add the state with key <key> to this set.
+
+        Raise BudgetExceeded if its stripe is full.
+        """
+        self.add_if_absent(key)
+
+    def add_if_absent(self, key: Hashable) -> bool:
+        """
+        Add the state with key <key> to this set, and return True, unless it
+        is in the set already, in which case return False.
+
+        Raise BudgetExceeded if its stripe is full. The set knows nothing of
+        the search adding <key>, so the statistics the exception carries are
+        replaced with the search's own by the solver that catches it.
+        """
+        fingerprint = _shared_fingerprint(key)
+        start, size = self._segment(fingerprint)
+        stripe = start // size
+        slots = self._slots
+        slot = (fingerprint // self.stripes) % size
+        with self._locks[stripe]:
+            for _ in range(size):
+                stored = slots[start + slot]
+                if stored == fingerprint:
+                    return False
+                if not stored:
+                    slots[start + slot] = fingerprint
+                    self._counters[2 * stripe] += 1
+                    return True
+                self._counters[2 * stripe + 1] += 1
+                slot = (slot + 1) % size
+        raise BudgetExceeded(SEEN_LIMIT, SearchStats())
+
+    def update(self, keys: Iterable[Hashable]) -> None:
+        """
+        Add the state with each key in <keys> to this set.
+        """
+        for key in keys:
+            self.add_if_absent(key)
+
+    def load_factor(self) -> float:
+        """
+        Return the fraction of this set's capacity in use.
+
+        >>> seen = SharedSeenSet(8, 2)
+        >>> seen.update(['a', 'b'])
+        >>> seen.load_factor()
+        0.25
+        >>> seen.close()
+        """
+        return len(self) / self.capacity
+
+    def collisions(self) -> int:
+        """
+        Return the number of times adding a state found its slot already
+        taken by another state, and had to try the next one.
+        """
+        return sum(self._counters[1::2])
+
+    def clear(self) -> None:
+        """
+        Remove every state from this set.
+
+        No other process may be using the set meanwhile.
+        """
+        self._memory.buf[:] = bytes(self._memory.size)
+
+    def close(self) -> None:
+        """
+        Detach this process from the set, freeing the shared memory if this
+        process created it. The set can't be used once closed.
+        """
+        self._counters.release()
+        self._slots.release()
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+    def _view(self) -> None:
+        """
+        Set up the views of the counters and slots in the shared memory.
+        """
+        words = self._memory.buf.cast('Q')
+        self._counters = words[:2 * self.stripes]
+        self._slots = words[2 * self.stripes:2 * self.stripes + self.capacity]
+        words.release()
+
+    def _segment(self, fingerprint: int) -> Tuple[int, int]:
+        """
+        Return the index of the first slot of the stripe holding
+        <fingerprint>, and the number of slots in each stripe.
+        """
+        size = self.capacity // self.stripes
+        return (fingerprint % self.stripes) * size, size
+
+
+def _shared_fingerprint(key: Hashable) -> int:
+    """
+    Return the fingerprint of <key> in a SharedSeenSet, which is never 0.
+
+    >>> _shared_fingerprint('cat') == _shared_fingerprint('cat')
+    True
+    """
+    digest = blake2b(repr(key).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+class SearchHook:
+    """
+    An observer of the searches run by a solver it has been added to (see
+    Solver.add_hook). Each method is called when the corresponding event
+    happens; this class ignores all of them, so subclasses only override
+    the events they are interested in.
+
+    Hooks are called from inside the search, so they should be quick.
+    """
+
+    def on_expand(self, puzzle: Puzzle, depth: int) -> None:
+        """
+        Called when <puzzle>, <depth> moves from the initial puzzle, is
+        about to be expanded.
+        """
+
+    def on_prune(self, key: Hashable, reason: str) -> None:
+        """
+        Called when the state with key <key> is pruned from the search
+        because of <reason>: ALREADY_SEEN, FAILED_FAST, or a reason for the
+        search to run out of budget (such as NODE_LIMIT).
+
+        <key> is the state's string representation if the caller supplied
+        the set of seen states, and its state_key otherwise.
+        """
+
+    def on_goal(self, path: List[Puzzle]) -> None:
+        """
+        Called when <path>, ending in a solved state, has been found.
+        """
+
+    def on_frontier(self, size: int) -> None:
+        """
+        Called when the number of states waiting to be expanded grows to
+        <size>, more than it has been before in this search.
+        """
+
+
+class JsonTraceHook(SearchHook):
+    """
+    A hook that writes each event of a search to a file as a JSON object on
+    a line of its own, for analysis once the search is done.
+
+    Each object has an "event" (one of "expand", "prune", "goal" and
+    "frontier") and a "time" (seconds since the hook was created), along
+    with the details of the event.
+
+    === Private Attributes ===
+    _file: the open text file the events are written to
+    _start: the value of time.monotonic() when this hook was created
+    """
+    _file: TextIO
+    _start: float
+
+    def __init__(self, file: TextIO) -> None:
+        """
+        Create a new hook writing to the open text file <file>.
+        """
+        self._file = file
+        self._start = monotonic()
+
+    def on_expand(self, puzzle: Puzzle, depth: int) -> None:
+        """
+        Write an "expand" event with the state and its depth.
+        """
+        self._write({'event': 'expand', 'state': str(puzzle),
+                     'depth': depth})
+
+    def on_prune(self, key: Hashable, reason: str) -> None:
+        """
+        Write a "prune" event with the key of the state and the reason.
+        """
+        self._write({'event': 'prune', 'key': str(key), 'reason': reason})
+
+    def on_goal(self, path: List[Puzzle]) -> None:
+        """
+        Write a "goal" event with the length of the path and its final state.
+        """
+        self._write({'event': 'goal', 'length': len(path),
+                     'state': str(path[-1])})
+
+    def on_frontier(self, size: int) -> None:
+        """
+        Write a "frontier" event with the new size of the frontier.
+        """
+        self._write({'event': 'frontier', 'size': size})
+
+    def _write(self, event: Dict[str, object]) -> None:
+        """
+        Write <event>, stamped with the time, as one line of JSON.
+        """
+        event['time'] = monotonic() - self._start
+        self._file.write(json.dumps(event) + '\n')
+
+
+class Solver:
+    """"
+    A solver for full-information puzzles. This is an abstract class
+    that provides the interface for our solve method, along with depth first
+    enumeration and counting of solutions.
+
+    === Public Attributes ===
+    budget: the limits each search run by this solver must stay within, or
+        None for no limits
+    profile: whether searches collect the full set of SearchStats, rather
+        than only the ones that cost (almost) nothing to collect
+    stats: statistics about the most recent search run by this solver, or
+        None if it hasn't run one
+    hooks: the hooks told about the events of each search run by this
+        solver. When there are none, searches pay nothing for hooks.
+    dead_states: the table of states proven to have no solution, which
+        depth first searches (DfsSolver.solve, iter_solutions and
+        count_solutions) skip and add to, or None
+    seen_backend: the function creating the empty set in which a search
+        not given a seen set keeps the keys of the states it has seen (for
+        example FingerprintSet, to save memory), or None for a set.
+        ParallelDfsSolver and ParallelBfsSolver ignore it.
+    """
+    budget: Optional[Budget]
+    profile: bool
+    stats: Optional[SearchStats]
+    hooks: List[SearchHook]
+    dead_states: Optional[DeadStateMemo]
+    seen_backend: Optional[Callable[[], Set[Hashable]]]
+
+    def __init__(self, budget: Optional[Budget] = None,
+                 profile: bool = False,
+                 dead_states: Optional[DeadStateMemo] = None,
+                 seen_backend: Optional[Callable[[], Set[Hashable]]] = None) \
+            -> None:
+        """
+        Create a new solver whose searches are limited by <budget>, which
+        collects the full set of statistics if <profile>, whose depth
+        first searches share <dead_states> and whose searches keep the
+        states they have seen in a <seen_backend>.
+        """
+        self.budget = budget
+        self.profile = profile
+        self.stats = None
+        self.hooks = []
+        self.dead_states = dead_states
+        self.seen_backend = seen_backend
+
+    def add_hook(self, hook: SearchHook) -> None:
+        """
+        Tell <hook> about the events of each search run by this solver from
+        now on.
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook: SearchHook) -> None:
+        """
+        Stop telling <hook> about the events of searches run by this solver.
+        """
+        self.hooks.remove(hook)
+
+    # You may NOT change the interface to the solve method.
+    # Note the optional parameter seen and its type.
+    # Subclasses implement _search, which uses seen (through the _Search it
+    # is given) to keep track of all puzzle states that it encounters during
+    # the solution process.
+    def solve(self, puzzle: Puzzle,
+              seen: Optional[Set[str]] = None) -> List[Puzzle]:
+        """
+        Return a list of puzzle states representing a path to a solution of
+        <puzzle>. The first element in the list should be <puzzle>, the
+        second element should be a puzzle that is in <puzzle>.extensions(),
+        and so on. The last puzzle in the list should be such that it is in a
+        solved state.
+
+        In other words, each subsequent item of the returned list should take
+        the puzzle one step closer to a solution, which is represented by the
+        last item in the list.
+
+        Return an empty list if the puzzle has no solution.
+
+        <seen> is either None (default) or a set of puzzle states' string
+        representations, whose puzzle states can't be any part of the path to
+        the solution. When <seen> is None, states are instead told apart by
+        their (cheaper) state_key.
+
+        The list returned is a SolveResult, which also records whether the
+        search ran out of budget (in which case it is empty) and statistics
+        about the search.
+        """
+        search = self._new_search(seen)
+        try:
+            path = self._search(puzzle, search)
+        except BudgetExceeded as error:
+            return SolveResult([], error.reason, search.finish())
+        if path:
+            search.goal(path)
+        return SolveResult(path, None, search.finish())
+
+    def iter_solutions(self, puzzle: Puzzle,
+                       seen: Optional[Set[str]] = None) \
+            -> Iterator[List[Puzzle]]:
+        """
+        Yield, one at a time, a path from <puzzle> to each distinct solved
+        state that can be reached from it, searching depth first.
+
+        The search only runs as far as the caller consumes solutions, so a
+        caller that stops early never pays for the rest of the search. Each
+        path has the same form as a path returned by solve.
+
+        <seen> is as for solve. Raise BudgetExceeded if the search runs out
+        of budget.
+        """
+        search = self._new_search(seen)
+        return _depth_first(puzzle, search)
+
+    def count_solutions(self, puzzle: Puzzle, limit: Optional[int] = None,
+                        seen: Optional[Set[str]] = None) -> int:
+        """
+        Return the number of distinct solved states that can be reached
+        from <puzzle>, stopping the search as soon as <limit> of them have
+        been found (if <limit> is not None).
+
+        <seen> is as for solve. Raise BudgetExceeded if the search runs out
+        of budget.
+
+        The search is the one iter_solutions runs, but for puzzles with
+        moves (see Puzzle.moves), no path is built for a solution unless
+        this solver has hooks to report it to.
+        """
+        num_solutions = 0
+        search = self._new_search(seen)
+        for _ in _depth_first(puzzle, search, bool(self.hooks)):
+            num_solutions += 1
+            if num_solutions == limit:
+                break
+        return num_solutions
+
+    def _search(self, puzzle: Puzzle, search: _Search) -> List[Puzzle]:
+        """
+        Return a path from <puzzle> to a solution, as described in solve,
+        using the seen states and budget of <search>.
+
+        This is an abstract method that must be implemented
+        in a subclass.
+        """
+        raise NotImplementedError
+
+    def _new_search(self, seen: Optional[Set[str]]) -> _Search:
+        """
+        Begin a new search using the caller-supplied <seen>, making its
+        statistics this solver's stats.
+        """
+        search = _Search(seen, self.budget, self.profile, tuple(self.hooks),
+                         self.dead_states, self.seen_backend)
+        self.stats = search.stats
+        return search
+
+
+# sentinel returned by next() once a frame's extensions are exhausted
+_EXHAUSTED = object()
+
+_INFINITY = float('inf')
+
+# the approximate number of bytes, beyond the size of its key, taken by a
+# state's entry in a set of seen states, and by its search node and puzzle
+# while it is in the frontier; see AdaptiveSolver
+_SEEN_ENTRY_BYTES = 50
+_FRONTIER_ENTRY_BYTES = 200
+
+# the sizes of the key, parent key and state of a record in the files of an
+# ExternalBfsSolver, which are sorted by key
+_RECORD = Struct('<III')
+_RECORD_KEY = itemgetter(0)
+
+# whether each puzzle class (that has been searched) provides its own
+# iter_extensions; see _iter_extensions
+_LAZY_EXTENSIONS: Dict[type, bool] = {}
+
+# whether depth first searches make the moves of each puzzle class (that has
+# been searched); see _uses_moves
+_MOVE_CLASSES: Dict[type, bool] = {}
+
+
+def _state_key(puzzle: Puzzle) -> Hashable:
+    """
+    Return the state key of <puzzle>, falling back on its string
+    representation for puzzles that don't provide a state_key method.
+    """
+    state_key = getattr(puzzle, 'state_key', None)
+    return str(puzzle) if state_key is None else state_key()
+
+
+def _seen_and_key(seen: Optional[Set[str]],
+                  backend: Optional[Callable[[], Set[Hashable]]] = None) \
+        -> Tuple[Set[Hashable], Callable[[Puzzle], Hashable]]:
+    """
+    Return the set of seen states a search should use, along with the
+    function that maps a puzzle to its entry in that set.
+
+    A caller-supplied <seen> holds string representations, so states are
+    keyed by str. Otherwise the search starts from an empty set, made by
+    <backend> if it is not None, and keys states by the cheaper state_key.
+    """
+    if seen is None:
+        return (set() if backend is None else backend()), _state_key
+    return seen, str
+
+
+def _iter_extensions(puzzle: Puzzle) -> Iterator[Puzzle]:
+    """
+    Return an iterator over the extensions of <puzzle>.
+
+    The puzzle's iter_extensions method is used unless its class overrides
+    extensions more recently than iter_extensions (or has no
+    iter_extensions at all), in which case extensions is used.
+    """
+    cls = type(puzzle)
+    lazy = _LAZY_EXTENSIONS.get(cls)
+    if lazy is None:
+        lazy = False
+        for klass in cls.__mro__:
+            if 'iter_extensions' in vars(klass):
+                lazy = True
+                break
+            if 'extensions' in vars(klass):
+                break
+        _LAZY_EXTENSIONS[cls] = lazy
+    return puzzle.iter_extensions() if lazy else iter(puzzle.extensions())
+
+
+def _uses_moves(puzzle: Puzzle) -> bool:
+    """
+    Return whether depth first searches of <puzzle> should make its moves
+    (see Puzzle.moves) rather than build its extensions: its class must
+    implement moves, and not override extensions or iter_extensions more
+    recently.
+    """
+    cls = type(puzzle)
+    uses_moves = _MOVE_CLASSES.get(cls)
+    if uses_moves is None:
+        uses_moves = False
+        for klass in cls.__mro__:
+            if klass is Puzzle:
+                break
+            if 'moves' in vars(klass):
+                uses_moves = True
+                break
+            if 'extensions' in vars(klass) \
+                    or 'iter_extensions' in vars(klass):
+                break
+        _MOVE_CLASSES[cls] = uses_moves
+    return uses_moves
+
+
+class _Search:
+    """
+    The state of a single search run by a solver.
+
+    Searches call a puzzle's fail_fast and is_solved methods, generate its
+    extensions and compute its key through the functions held here, so that
+    a profiling search (or one with hooks) can time them and report on them
+    without slowing down other searches.
+
+    === Public Attributes ===
+    seen: the keys of the states that have been seen
+    key_of: the function mapping a puzzle to its key in seen
+    fail_fast: the function calling a puzzle's fail_fast method
+    is_solved: the function calling a puzzle's is_solved method
+    extensions: the function returning an iterator over a puzzle's
+        extensions
+    moves: the function returning a puzzle's moves
+    stats: statistics about this search
+    dead: the states depth first searches skip and record as proven dead,
+        or None
+
+    === Private Attributes ===
+    _budget: the limits this search must stay within, or None
+    _hooks: the hooks told about the events of this search
+    _profile: whether this search collects the full set of statistics and
+        reports events to its hooks
+    _start: the value of time.monotonic() when this search began
+    _deadline: the value of time.monotonic() by which this search must
+        end, or None
+    """
+    __slots__ = ('seen', 'key_of', 'fail_fast', 'is_solved', 'extensions',
+                 'moves', 'stats', 'dead', '_budget', '_hooks', '_profile',
+                 '_start', '_deadline')
+    seen: Set[Hashable]
+    key_of: Callable[[Puzzle], Hashable]
+    fail_fast: Callable[[Puzzle], bool]
+    is_solved: Callable[[Puzzle], bool]
+    extensions: Callable[[Puzzle], Iterator[Puzzle]]
+    moves: Callable[[Puzzle], List[Hashable]]
+    stats: SearchStats
+    dead: Optional[DeadStateMemo]
+    _budget: Optional[Budget]
+    _hooks: Tuple[SearchHook, ...]
+    _profile: bool
+    _start: float
+    _deadline: Optional[float]
+
+    def __init__(self, seen: Optional[Set[str]], budget: Optional[Budget],
+                 profile: bool = False,
+                 hooks: Tuple[SearchHook, ...] = (),
+                 dead: Optional[DeadStateMemo] = None,
+                 backend: Optional[Callable[[], Set[Hashable]]] = None) \
+            -> None:
+        """
+        Begin a new search using the caller-supplied <seen> or a new
+        <backend> (see _seen_and_key), limited by <budget>, which reports
+        its events to <hooks> and skips the states in <dead>. The full set
+        of statistics is collected if <profile>, or if there are any hooks.
+        """
+        seen, key_of = _seen_and_key(seen, backend)
+        self.stats = SearchStats()
+        self.dead = dead
+        self._budget = budget
+        self._hooks = hooks
+        self._profile = profile or bool(hooks)
+        if self._profile:
+            self.seen = _CountingSet(seen, self.stats, hooks)
+            self.key_of = _timed(key_of, self.stats, 'state_key_time')
+            self.fail_fast = _timed_fail_fast(self.stats, key_of, hooks)
+            self.is_solved = _timed(_IS_SOLVED, self.stats, 'is_solved_time')
+            self.extensions = _timed_extensions(self.stats)
+            self.moves = _timed_moves(self.stats)
+        else:
+            self.seen, self.key_of = seen, key_of
+            self.fail_fast, self.is_solved = _FAIL_FAST, _IS_SOLVED
+            self.extensions, self.moves = _iter_extensions, _MOVES
+        self._start = monotonic()
+        if budget is None or budget.time_limit is None:
+            self._deadline = None
+        else:
+            self._deadline = self._start + budget.time_limit
+
+    def expand(self, node: _SearchNode, frontier: Iterable) -> None:
+        """
+        Record that the state at <node> is about to be expanded, while the
+        states in <frontier> are waiting to be.
+
+        Raise BudgetExceeded if this search has run out of budget.
+        """
+        stats = self.stats
+        stats.nodes_expanded += 1
+        if self._budget is not None:
+            self._check_budget(node)
+        if self._profile:
+            stats.max_depth = max(stats.max_depth, node.depth)
+            size = len(frontier)
+            if size > stats.peak_frontier:
+                stats.peak_frontier = size
+                for hook in self._hooks:
+                    hook.on_frontier(size)
+            for hook in self._hooks:
+                hook.on_expand(node.puzzle, node.depth)
+
+    def goal(self, path: List[Puzzle]) -> None:
+        """
+        Tell the hooks of this search that <path> leads to a solution.
+        """
+        for hook in self._hooks:
+            hook.on_goal(path)
+
+    def finish(self) -> SearchStats:
+        """
+        Return the statistics of this search, as of now.
+        """
+        self.stats.elapsed = monotonic() - self._start
+        self.stats.seen_size = len(self.seen)
+        return self.stats
+
+    def _check_budget(self, node: _SearchNode) -> None:
+        """
+        Raise BudgetExceeded, instead of expanding the state at <node>, if
+        this search has gone over any of the limits in its budget, or has
+        been cancelled.
+        """
+        budget = self._budget
+        if budget.token is not None and budget.token.is_cancelled():
+            reason = CANCELLED
+        elif (budget.max_nodes is not None
+              and self.stats.nodes_expanded > budget.max_nodes):
+            reason = NODE_LIMIT
+        elif budget.max_seen is not None and len(self.seen) > budget.max_seen:
+            reason = SEEN_LIMIT
+        elif self._deadline is not None and monotonic() > self._deadline:
+            reason = TIME_LIMIT
+        else:
+            return
+        if self._hooks:
+            key = self.key_of(node.puzzle)
+            for hook in self._hooks:
+                hook.on_prune(key, reason)
+        raise BudgetExceeded(reason, self.finish())
+
+
+_FAIL_FAST = methodcaller('fail_fast')
+_IS_SOLVED = methodcaller('is_solved')
+_MOVES = methodcaller('moves')
+
+
+class _CountingSet:
+    """
+    A set of seen states that counts, in its stats, the membership tests
+    that find a state already in it, and reports each of them to its hooks.
+
+    === Private Attributes ===
+    _items: the set the states are kept in
+    _stats: the statistics the membership tests are counted in
+    _hooks: the hooks told about each state found in this set
+    """
+    __slots__ = ('_items', '_stats', '_hooks')
+    _items: Set[Hashable]
+    _stats: SearchStats
+    _hooks: Tuple[SearchHook, ...]
+
+    def __init__(self, items: Set[Hashable], stats: SearchStats,
+                 hooks: Tuple[SearchHook, ...]) -> None:
+        """
+        Wrap <items>, counting duplicates in <stats> and reporting them to
+        <hooks>.
+        """
+        self._items = items
+        self._stats = stats
+        self._hooks = hooks
+
+    def __contains__(self, item: Hashable) -> bool:
+        """
+        Return whether <item> is in this set.
+        """
+        if item in self._items:
+            self._stats.duplicates_pruned += 1
+            for hook in self._hooks:
+                hook.on_prune(item, ALREADY_SEEN)
+            return True
+        return False
+
+    def __len__(self) -> int:
+        """
+        Return the number of states in this set.
+        """
+        return len(self._items)
+
+    def add(self, item: Hashable) -> None:
+        """
+        Add <item> to this set.
+        """
+        self._items.add(item)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        """
+        Return an iterator over the states in this set.
+        """
+        return iter(self._items)
+
+    def update(self, items: Iterable[Hashable]) -> None:
+        """
+        Add every item of <items> to this set.
+        """
+        self._items.update(items)
+
+
+def _timed(function: Callable, stats: SearchStats,
+           field: str) -> Callable:
+    """
+    Return a function that calls <function>, adding the time spent in it to
+    the attribute of <stats> named <field>.
+    """
+    def timed(puzzle: Puzzle) -> object:
+        start = perf_counter()
+        result = function(puzzle)
+        setattr(stats, field,
+                getattr(stats, field) + perf_counter() - start)
+        return result
+    return timed
+
+
+def _timed_fail_fast(stats: SearchStats,
+                     key_of: Callable[[Puzzle], Hashable],
+                     hooks: Tuple[SearchHook, ...]) \
+        -> Callable[[Puzzle], bool]:
+    """
+    Return a function that calls a puzzle's fail_fast method, recording the
+    time spent in it and whether it failed in <stats>, and reporting each
+    puzzle that fails (by its key, given by <key_of>) to <hooks>.
+    """
+    def fail_fast(puzzle: Puzzle) -> bool:
+        start = perf_counter()
+        result = puzzle.fail_fast()
+        stats.fail_fast_time += perf_counter() - start
+        if result:
+            stats.fail_fast_pruned += 1
+            for hook in hooks:
+                hook.on_prune(key_of(puzzle), FAILED_FAST)
+        return result
+    return fail_fast
+
+
+def _timed_extensions(stats: SearchStats) \
+        -> Callable[[Puzzle], Iterator[Puzzle]]:
+    """
+    Return a function that iterates over a puzzle's extensions (see
+    _iter_extensions), recording in <stats> the time spent generating them
+    and how many were generated.
+    """
+    def extensions(puzzle: Puzzle) -> Iterator[Puzzle]:
+        start = perf_counter()
+        children = _iter_extensions(puzzle)
+        while True:
+            child = next(children, _EXHAUSTED)
+            stats.extensions_time += perf_counter() - start
+            if child is _EXHAUSTED:
+                return
+            stats.nodes_generated += 1
+            yield child
+            start = perf_counter()
+    return extensions
+
+
+def _timed_moves(stats: SearchStats) -> Callable[[Puzzle], List[Hashable]]:
+    """
+    Return a function that returns a puzzle's moves, recording in <stats>
+    the time spent finding them (as time spent generating extensions) and
+    how many were found.
+    """
+    def moves(puzzle: Puzzle) -> List[Hashable]:
+        start = perf_counter()
+        found = puzzle.moves()
+        stats.extensions_time += perf_counter() - start
+        stats.nodes_generated += len(found)
+        return found
+    return moves
+
+
+class _SearchNode:
+    """
+    A puzzle state reached during a search, linked to the node it was
+    reached from.
+
+    === Public Attributes ===
+    puzzle: the puzzle state at this node
+    parent: the node this state was reached from, or None for the root
+    depth: the number of moves from the root to this node
+    """
+    __slots__ = ('puzzle', 'parent', 'depth')
+    puzzle: Puzzle
+    parent: Optional[_SearchNode]
+    depth: int
+
+    def __init__(self, puzzle: Puzzle,
+                 parent: Optional[_SearchNode] = None) -> None:
+        """
+        Create a new search node for <puzzle>, reached from <parent>.
+        """
+        self.puzzle = puzzle
+        self.parent = parent
+        self.depth = 0 if parent is None else parent.depth + 1
+
+    def path(self) -> List[Puzzle]:
+        """
+        Return the list of puzzle states from the root of the search to
+        this node, inclusive.
+        """
+        path = [None] * (self.depth + 1)
+        node = self
+        while node is not None:
+            path[node.depth] = node.puzzle
+            node = node.parent
+        return path
+
+
+def _depth_first(puzzle: Puzzle, search: _Search,
+                 paths: bool = True) -> Iterator[Optional[List[Puzzle]]]:
+    """
+    Yield the path to each solved state reachable from <puzzle>, in depth
+    first order, skipping states that <search> has already seen. If not
+    <paths>, None may be yielded in place of a path (see
+    _depth_first_moves).
+
+    Each path is reported to the hooks of <search>, and its statistics are
+    brought up to date once the caller stops iterating.
+    """
+    try:
+        for path in _depth_first_paths(puzzle, search, paths):
+            if path is not None:
+                search.goal(path)
+            yield path
+    except BudgetExceeded as error:
+        # the exception may come from a seen set (a SharedSeenSet, say)
+        # that has no statistics of its own to give it
+        error.stats = search.stats
+        raise
+    finally:
+        search.finish()
+
+
+def _depth_first_paths(puzzle: Puzzle, search: _Search,
+                       paths: bool = True) \
+        -> Iterator[Optional[List[Puzzle]]]:
+    """
+    Yield the paths described in _depth_first.
+
+    Every state reached is added to the seen states, including those that
+    fail fast. Solved states are not extended any further.
+    """
+    if search.dead is not None:
+        yield from _depth_first_memo(puzzle, search, search.dead)
+        return
+    if _uses_moves(puzzle):
+        yield from _depth_first_moves(puzzle, search, paths)
+        return
+    seen, key_of = search.seen, search.key_of
+    fail_fast, is_solved = search.fail_fast, search.is_solved
+    extensions = search.extensions
+    key = key_of(puzzle)
+    if key in seen or fail_fast(puzzle):
+        return
+    seen.add(key)
+    if is_solved(puzzle):
+        yield [puzzle]
+        return
+    # each frame is a node on the current path, paired with an iterator
+    # over the extensions of that node that are still to be tried
+    node = _SearchNode(puzzle)
+    stack = []
+    search.expand(node, stack)
+    stack.append((node, extensions(puzzle)))
+    while stack:
+        node, children = stack[-1]
+        child = next(children, _EXHAUSTED)
+        if child is _EXHAUSTED:
+            stack.pop()
+            continue
+        key = key_of(child)
+        if key in seen:
+            continue
+        # a child that fails fast (or whose subtree turns out to hold no
+        # solution) is recorded in seen, just like the original recursive
+        # DfsSolver did
+        seen.add(key)
+        if fail_fast(child):
+            continue
+        child_node = _SearchNode(child, node)
+        if is_solved(child):
+            yield child_node.path()
+        else:
+            search.expand(child_node, stack)
+            stack.append((child_node, extensions(child)))
+
+
+def _depth_first_moves(puzzle: Puzzle, search: _Search,
+                       paths: bool) -> Iterator[Optional[List[Puzzle]]]:
+    """
+    Yield the paths described in _depth_first, making moves on a snapshot
+    of <puzzle> (see Puzzle.moves) instead of building extensions. If not
+    <paths>, None is yielded in place of each path, which saves building it.
+
+    As in _depth_first_paths, every state reached is added to the seen
+    states.
+    """
+    seen, key_of = search.seen, search.key_of
+    fail_fast, is_solved = search.fail_fast, search.is_solved
+    moves = search.moves
+    key = key_of(puzzle)
+    if key in seen or fail_fast(puzzle):
+        return
+    seen.add(key)
+    if is_solved(puzzle):
+        yield [puzzle]
+        return
+    state = puzzle.snapshot()
+    # each frame is a node on the current path, paired with an iterator
+    # over the moves from that node that are still to be tried and the move
+    # that led to it
+    node = _SearchNode(state)
+    stack = []
+    search.expand(node, stack)
+    stack.append((node, iter(moves(state)), None))
+    while stack:
+        node, children, last = stack[-1]
+        move = next(children, _EXHAUSTED)
+        if move is _EXHAUSTED:
+            stack.pop()
+            if last is not None:
+                state.undo(last)
+            continue
+        state.apply(move)
+        key = key_of(state)
+        if key in seen:
+            state.undo(move)
+            continue
+        seen.add(key)
+        if fail_fast(state):
+            state.undo(move)
+        elif is_solved(state):
+            if paths:
+                yield _replay(puzzle, [frame[2] for frame in stack[1:]]
+                              + [move])
+            else:
+                yield None
+            state.undo(move)
+        else:
+            child_node = _SearchNode(state, node)
+            search.expand(child_node, stack)
+            stack.append((child_node, iter(moves(state)), move))
+
+
+def _replay(puzzle: Puzzle, moves: List[Hashable]) -> List[Puzzle]:
+    """
+    Return the path from <puzzle> given by making each of <moves> in turn,
+    with a snapshot for each state after the first.
+    """
+    path = [puzzle]
+    for move in moves:
+        state = path[-1].snapshot()
+        state.apply(move)
+        path.append(state)
+    return path
+
+
+def _depth_first_memo(puzzle: Puzzle, search: _Search,
+                      dead: DeadStateMemo) -> Iterator[List[Puzzle]]:
+    """
+    Yield the paths described in _depth_first, skipping the states in
+    <dead> and adding to it each state proven to have no solution.
+
+    A state is proven dead once all of its extensions have been searched
+    without reaching a solved state, provided none of them was skipped for
+    having been seen already without being known to be dead (it might, for
+    instance, be an ancestor of the state).
+    """
+    seen, key_of = search.seen, search.key_of
+    fail_fast, is_solved = search.fail_fast, search.is_solved
+    extensions = search.extensions
+    key = key_of(puzzle)
+    if key in seen or fail_fast(puzzle):
+        return
+    seen.add(key)
+    if key in dead:
+        return
+    if is_solved(puzzle):
+        yield [puzzle]
+        return
+    # as in _depth_first_paths, but each frame also holds the key of its
+    # state and whether that state can still be proven dead
+    node = _SearchNode(puzzle)
+    stack = []
+    search.expand(node, stack)
+    stack.append([node, extensions(puzzle), key, True])
+    while stack:
+        frame = stack[-1]
+        child = next(frame[1], _EXHAUSTED)
+        if child is _EXHAUSTED:
+            stack.pop()
+            if frame[3]:
+                dead.add(frame[2])
+            elif stack:
+                stack[-1][3] = False
+            continue
+        key = key_of(child)
+        if key in seen:
+            if key not in dead:
+                frame[3] = False
+            continue
+        seen.add(key)
+        if fail_fast(child) or key in dead:
+            continue
+        child_node = _SearchNode(child, frame[0])
+        if is_solved(child):
+            frame[3] = False
+            yield child_node.path()
+        else:
+            search.expand(child_node, stack)
+            stack.append([child_node, extensions(child), key, True])
+
+
+# DfsSolver walks the search tree with an explicit stack of frames rather than
+# recursing, so the depth of a search is not bounded by Python's recursion
+# limit. The order in which states are visited (and therefore the path that
+# is returned) is the same as that of the original recursive implementation.
+# For puzzles with moves (see Puzzle.moves), it makes and takes back moves on
+# a single snapshot of the puzzle instead of building each extension.
+class DfsSolver(Solver):
+    """"
+    A solver for full-information puzzles that uses
+    a depth first search strategy.
+    """
+
+    def _search(self, puzzle: Puzzle, search: _Search) -> List[Puzzle]:
+        """
+        Return the first path to a solution of <puzzle> found by a depth
+        first search, or an empty list if there is none.
+        """
+        return next(_depth_first_paths(puzzle, search), [])
+
+
+class RestartingDfsSolver(Solver):
+    """"
+    A solver for full-information puzzles that uses a depth first search
+    which is restarted from scratch whenever an attempt expands more states
+    than it is allowed, trying the extensions of each state in a new random
+    order on every attempt.
+
+    A depth first search that makes a bad early choice can spend a very long
+    time in a subtree with no solution; restarting bounds how long it stays
+    there. The number of states each attempt may expand follows a Luby
+    schedule (unit times 1, 1, 2, 1, 1, 2, 4, 1, ...) or a geometric one
+    (unit times 1, growth, growth ** 2, ...). Either grows without bound, so
+    an attempt eventually searches everything and a puzzle with no solution
+    is still recognised as such.
+
+    === Public Attributes ===
+    unit: the number of states the shortest attempts may expand
+    schedule: LUBY or GEOMETRIC
+    growth: the factor by which a geometric schedule grows
+    seed: the seed of the random order of extensions, or None for a
+        different order each time
+    restarts: the number of restarts in the most recent search
+    """
+    unit: int
+    schedule: str
+    growth: float
+    seed: Optional[int]
+    restarts: int
+
+    def __init__(self, unit: int = 100, schedule: str = LUBY,
+                 growth: float = 1.5, seed: Optional[int] = None,
+                 budget: Optional[Budget] = None,
+                 profile: bool = False) -> None:
+        """
+        Create a new restarting depth first solver whose attempts are
+        limited by <schedule> in multiples of <unit> states, growing by
+        <growth> if it is geometric, and whose random order is seeded with
+        <seed>. <budget> and <profile> are as for Solver.
+        """
+        Solver.__init__(self, budget, profile)
+        self.unit = unit
+        self.schedule = schedule
+        self.growth = growth
+        self.seed = seed
+        self.restarts = 0
+
+    def _search(self, puzzle: Puzzle, search: _Search) -> List[Puzzle]:
+        """
+        Return the first path to a solution of <puzzle> found by an attempt
+        that stays within its limit, or an empty list if there is none.
+        """
+        self.restarts = 0
+        key = search.key_of(puzzle)
+        if key in search.seen or search.fail_fast(puzzle):
+            return []
+        if search.is_solved(puzzle):
+            search.seen.add(key)
+            return [puzzle]
+        rng = Random(self.seed)
+        attempt = 1
+        while True:
+            if self.schedule == LUBY:
+                limit = self.unit * _luby(attempt)
+            else:
+                limit = round(self.unit * self.growth ** (attempt - 1))
+            path = _restarting_attempt(puzzle, key, search, limit, rng)
+            if path is not None:
+                return path
+            self.restarts += 1
+            attempt += 1
+
+
+def _luby(i: int) -> int:
+    """
+    Return the <i>th term of the Luby sequence.
+
+    >>> [_luby(i) for i in range(1, 16)]
+    [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8]
+    """
+    while True:
+        k = i.bit_length()
+        if i == (1 << k) - 1:
+            return 1 << (k - 1)
+        i -= (1 << (k - 1)) - 1
+
+
+def _restarting_attempt(puzzle: Puzzle, key: Hashable, search: _Search,
+                        limit: int, rng: Random) -> Optional[List[Puzzle]]:
+    """
+    Run one attempt of a RestartingDfsSolver from <puzzle>, whose key is
+    <key>, trying extensions in an order shuffled by <rng>.
+
+    Return the path to the first solution found, an empty list if the
+    attempt searched everything without finding one, or None if it was
+    abandoned after expanding <limit> states. The states reached are only
+    added to the seen states of <search> once the search is over, since
+    the next attempt must be free to reach them again.
+    """
+    seen, key_of = search.seen, search.key_of
+    fail_fast, is_solved = search.fail_fast, search.is_solved
+    extensions = search.extensions
+    visited = {key}
+    node = _SearchNode(puzzle)
+    stack = []
+    search.expand(node, stack)
+    stack.append((node, _shuffled(extensions(puzzle), rng)))
+    expanded = 1
+    while stack:
+        node, children = stack[-1]
+        child = next(children, _EXHAUSTED)
+        if child is _EXHAUSTED:
+            stack.pop()
+            continue
+        key = key_of(child)
+        if key in seen or key in visited:
+            continue
+        visited.add(key)
+        if fail_fast(child):
+            continue
+        child_node = _SearchNode(child, node)
+        if is_solved(child):
+            seen.update(visited)
+            return child_node.path()
+        if expanded == limit:
+            return None
+        expanded += 1
+        search.expand(child_node, stack)
+        stack.append((child_node, _shuffled(extensions(child), rng)))
+    seen.update(visited)
+    return []
+
+
+def _shuffled(states: Iterator[Puzzle], rng: Random) -> Iterator[Puzzle]:
+    """
+    Return an iterator over <states> in an order shuffled by <rng>.
+    """
+    states = list(states)
+    rng.shuffle(states)
+    return iter(states)
+
+
+# BfsSolver keeps its frontier of parent-linked nodes in a collections.deque.
+class BfsSolver(Solver):
+    """"
+    A solver for full-information puzzles that uses
+    a breadth first search strategy.
+
+    For puzzles that declare themselves reversible (see
+    Puzzle.is_reversible), the search is run from both ends at once, which
+    reaches far fewer states on long paths. The path found is still a
+    shortest one.
+
+    === Public Attributes ===
+    bidirectional: whether to search from both ends of reversible puzzles
+    """
+    bidirectional: bool
+
+    def __init__(self, bidirectional: bool = True,
+                 budget: Optional[Budget] = None,
+                 profile: bool = False,
+                 seen_backend: Optional[Callable[[], Set[Hashable]]] = None) \
+            -> None:
+        """
+        Create a new breadth first solver, which searches reversible puzzles
+        from both ends if <bidirectional>. <budget>, <profile> and
+        <seen_backend> are as for Solver.
+        """
+        Solver.__init__(self, budget, profile, seen_backend=seen_backend)
+        self.bidirectional = bidirectional
+
+    def _search(self, puzzle: Puzzle, search: _Search) -> List[Puzzle]:
+        """
+        Return a shortest path to a solution of <puzzle>, or an empty list
+        if there is none.
+        """
+        seen, key_of = search.seen, search.key_of
+        fail_fast, is_solved = search.fail_fast, search.is_solved
+        extensions = search.extensions
+        key = key_of(puzzle)
+        if key in seen or fail_fast(puzzle):
+            return []
+        seen.add(key)
+        if is_solved(puzzle):
+            return [puzzle]
+        if self.bidirectional and _is_reversible(puzzle):
+            return _bidirectional_search(puzzle, key, search)
+        # the frontier holds parent-linked nodes rather than whole paths; the
+        # path is only built once, for the solution
+        frontier = deque([_SearchNode(puzzle)])
+        while frontier:
+            node = frontier.popleft()
+            search.expand(node, frontier)
+            for ext in extensions(node.puzzle):
+                if fail_fast(ext):
+                    continue
+                key = key_of(ext)
+                if key in seen:
+                    continue
+                seen.add(key)
+                if is_solved(ext):
+                    return _SearchNode(ext, node).path()
+                frontier.append(_SearchNode(ext, node))
+        return []
+
+
+def _is_reversible(puzzle: Puzzle) -> bool:
+    """
+    Return whether <puzzle> declares itself reversible, treating puzzles
+    without an is_reversible method as not reversible.
+    """
+    is_reversible = getattr(puzzle, 'is_reversible', None)
+    return is_reversible is not None and is_reversible()
+
+
+def _bidirectional_search(puzzle: Puzzle, key: Hashable,
+                          search: _Search) -> List[Puzzle]:
+    """
+    Return a shortest path from <puzzle> to its goal state, found by
+    breadth first searches from both ends, or an empty list if there is no
+    such path.
+
+    <puzzle> must be reversible, not solved, and already recorded in the
+    seen states of <search> under <key>. Every state reached is added to
+    the seen states; states that were seen beforehand are never part of the
+    path.
+    """
+    seen = search.seen
+    goal = puzzle.goal_state()
+    goal_key = search.key_of(goal)
+    if goal_key in seen or search.fail_fast(goal):
+        return []
+    seen.add(goal_key)
+    # each side maps the key of every state it has reached to its node
+    forward = {key: _SearchNode(puzzle)}
+    backward = {goal_key: _SearchNode(goal)}
+    forward_layer = list(forward.values())
+    backward_layer = list(backward.values())
+    while forward_layer and backward_layer:
+        # grow whichever side has the smaller frontier by one whole layer
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meet = _expand_layer(forward_layer, forward,
+                                                backward, search)
+            if meet is not None:
+                return _join_paths(meet[0], backward[meet[1]])
+        else:
+            backward_layer, meet = _expand_layer(backward_layer, backward,
+                                                 forward, search)
+            if meet is not None:
+                return _join_paths(forward[meet[1]], meet[0])
+    return []
+
+
+def _expand_layer(layer: List[_SearchNode],
+                  reached: Dict[Hashable, _SearchNode],
+                  other: Dict[Hashable, _SearchNode],
+                  search: _Search) \
+        -> Tuple[List[_SearchNode], Optional[Tuple[_SearchNode, Hashable]]]:
+    """
+    Expand every node in <layer>, one side of a bidirectional search whose
+    states are in <reached>, while <other> holds the states reached by the
+    other side.
+
+    Return the next layer, along with the node in <layer> and the key of
+    its extension that give the shortest path through a state reached by
+    both sides, or None if the sides did not meet.
+    """
+    seen, key_of = search.seen, search.key_of
+    fail_fast, extensions = search.fail_fast, search.extensions
+    next_layer = []
+    meet = None
+    meet_length = _INFINITY
+    for node in layer:
+        search.expand(node, next_layer)
+        for ext in extensions(node.puzzle):
+            if fail_fast(ext):
+                continue
+            ext_key = key_of(ext)
+            if ext_key in other:
+                length = node.depth + 1 + other[ext_key].depth
+                if length < meet_length:
+                    meet, meet_length = (node, ext_key), length
+            elif ext_key not in seen:
+                seen.add(ext_key)
+                child = _SearchNode(ext, node)
+                reached[ext_key] = child
+                next_layer.append(child)
+    return next_layer, meet
+
+
+def _join_paths(forward: _SearchNode, backward: _SearchNode) -> List[Puzzle]:
+    """
+    Return the path from the root of the forward search to <forward>,
+    followed by the states from <backward> back to the root of the backward
+    search (the goal).
+    """
+    path = forward.path()
+    node = backward
+    while node is not None:
+        path.append(node.puzzle)
+        node = node.parent
+    return path
+
+
+class AStarSolver(Solver):
+    """"
+    A solver for full-information puzzles that uses a best-first search
+    strategy, guided by each puzzle's heuristic and step_cost methods.
+
+    By default this is A* search: states are explored in order of the cost
+    of reaching them plus their heuristic estimate, and the cheapest path
+    is returned provided the heuristic is consistent: it never overestimates,
+    and never drops by more than the cost of a move. In greedy mode,
+    states are explored in order of their heuristic estimate alone, which
+    usually finds a path sooner but gives no guarantee that it is cheapest.
+
+    States are added to the seen states as they are expanded.
+
+    === Public Attributes ===
+    greedy: whether to order states by their heuristic estimate alone
+    """
+    greedy: bool
+
+    def __init__(self, greedy: bool = False,
+                 budget: Optional[Budget] = None,
+                 profile: bool = False,
+                 seen_backend: Optional[Callable[[], Set[Hashable]]] = None) \
+            -> None:
+        """
+        Create a new A* solver, or a greedy best-first solver if <greedy>.
+        <budget>, <profile> and <seen_backend> are as for Solver.
+        """
+        Solver.__init__(self, budget, profile, seen_backend=seen_backend)
+        self.greedy = greedy
+
+    def _search(self, puzzle: Puzzle, search: _Search) -> List[Puzzle]:
+        """
+        Return the first path to a solution of <puzzle> reached in best
+        first order, or an empty list if there is none.
+        """
+        seen, key_of = search.seen, search.key_of
+        fail_fast, is_solved = search.fail_fast, search.is_solved
+        extensions = search.extensions
+        key = key_of(puzzle)
+        if key in seen or fail_fast(puzzle):
+            return []
+        # the cheapest known cost of reaching each state not yet expanded;
+        # entries on the heap that were since improved upon (or whose state
+        # has already been expanded) are skipped when popped
+        best = {key: 0}
+        # heap entries are (priority, -cost, tie, node, key); among equal
+        # priorities, deeper states are preferred, then older ones
+        tie = count()
+        heap = [(self._priority(puzzle, 0), 0, next(tie),
+                 _SearchNode(puzzle), key)]
+        while heap:
+            _, cost, _, node, key = heappop(heap)
+            cost = -cost
+            if key in seen or cost > best[key]:
+                continue
+            del best[key]
+            seen.add(key)
+            current = node.puzzle
+            if is_solved(current):
+                return node.path()
+            search.expand(node, heap)
+            for ext in extensions(current):
+                ext_key = key_of(ext)
+                if ext_key in seen or fail_fast(ext):
+                    continue
+                ext_cost = cost + current.step_cost(ext)
+                if ext_key in best and best[ext_key] <= ext_cost:
+                    continue
+                best[ext_key] = ext_cost
+                heappush(heap, (self._priority(ext, ext_cost), -ext_cost,
+                                next(tie), _SearchNode(ext, node), ext_key))
+        return []
+
+    def _priority(self, puzzle: Puzzle, cost: float) -> float:
+        """
+        Return the priority of <puzzle>, reached at a cost of <cost>; states
+        with a lower priority are explored first.
+        """
+        if self.greedy:
+            return puzzle.heuristic()
+        return cost + puzzle.heuristic()
+
+
+class IDAStarSolver(Solver):
+    """"
+    A solver for full-information puzzles that uses iterative deepening A*
+    search, guided by each puzzle's heuristic and step_cost methods.
+
+    Each iteration is a depth first search that abandons any state whose
+    cost plus heuristic estimate exceeds a bound; the bound starts at the
+    estimate for the initial puzzle and is raised to the smallest abandoned
+    value after each iteration. Only the current path is kept in memory, so
+    memory use is linear in the depth of the search. The cheapest path is
+    returned provided the heuristic never overestimates.
+
+    To keep memory linear in depth, only the states on the returned path are
+    added to the seen states.
+
+    Puzzles with moves (see Puzzle.moves) whose moves all cost 1 are searched
+    by making and taking back moves on a single puzzle.
+
+    === Public Attributes ===
+    table_size: the maximum number of states held in the transposition
+        table, which lets an iteration skip a state already reached at no
+        greater cost. 0 disables the table.
+    """
+    table_size: int
+
+    def __init__(self, table_size: int = 0,
+                 budget: Optional[Budget] = None,
+                 profile: bool = False,
+                 seen_backend: Optional[Callable[[], Set[Hashable]]] = None) \
+            -> None:
+        """
+        Create a new IDA* solver whose transposition table holds at most
+        <table_size> states. <budget>, <profile> and <seen_backend> are as
+        for Solver.
+        """
+        Solver.__init__(self, budget, profile, seen_backend=seen_backend)
+        self.table_size = table_size
+
+    def _search(self, puzzle: Puzzle, search: _Search) -> List[Puzzle]:
+        """
+        Return a cheapest path to a solution of <puzzle>, or an empty list
+        if there is none.
+        """
+        seen, key_of = search.seen, search.key_of
+        key = key_of(puzzle)
+        if key in seen or search.fail_fast(puzzle):
+            return []
+        if search.is_solved(puzzle):
+            seen.add(key)
+            return [puzzle]
+        bounded_search = self._bounded_search
+        if _uses_moves(puzzle) and type(puzzle).step_cost is Puzzle.step_cost:
+            bounded_search = self._bounded_search_moves
+        bound = self._estimate(puzzle)
+        while bound != _INFINITY:
+            path, bound = bounded_search(puzzle, key, search, bound)
+            if path:
+                seen.update(key_of(p) for p in path)
+                return path
+        return []
+
+    def _estimate(self, puzzle: Puzzle) -> float:
+        """
+        Return the estimated cost of the cheapest path from <puzzle> to a
+        solution.
+        """
+        return puzzle.heuristic()
+
+    def _bounded_search(self, puzzle: Puzzle, key: Hashable, search: _Search,
+                        bound: float) -> Tuple[List[Puzzle], float]:
+        """
+        Run one bounded depth first search from <puzzle>, whose key is <key>.
+
+        Return the path to the first solution found and <bound>, or an empty
+        list and the smallest estimate that exceeded <bound> (infinity if no
+        state was abandoned).
+        """
+        seen, key_of = search.seen, search.key_of
+        fail_fast, is_solved = search.fail_fast, search.is_solved
+        extensions = search.extensions
+        next_bound = _INFINITY
+        table = {}
+        # the keys of the states on the current path, to avoid cycles
+        on_path = {key}
+        node = _SearchNode(puzzle)
+        stack = []
+        search.expand(node, stack)
+        stack.append((node, key, 0, extensions(puzzle)))
+        while stack:
+            node, key, cost, children = stack[-1]
+            child = next(children, _EXHAUSTED)
+            if child is _EXHAUSTED:
+                stack.pop()
+                on_path.discard(key)
+                continue
+            child_key = key_of(child)
+            if child_key in seen or child_key in on_path \
+                    or fail_fast(child):
+                continue
+            child_cost = cost + node.puzzle.step_cost(child)
+            estimate = child_cost + self._estimate(child)
+            if estimate > bound:
+                next_bound = min(next_bound, estimate)
+                continue
+            child_node = _SearchNode(child, node)
+            if is_solved(child):
+                return child_node.path(), bound
+            if self.table_size:
+                if table.get(child_key, _INFINITY) <= child_cost:
+                    continue
+                if child_key in table or len(table) < self.table_size:
+                    table[child_key] = child_cost
+            on_path.add(child_key)
+            search.expand(child_node, stack)
+            stack.append((child_node, child_key, child_cost,
+                          extensions(child)))
+        return [], next_bound
+
+    def _bounded_search_moves(self, puzzle: Puzzle, key: Hashable,
+                              search: _Search,
+                              bound: float) -> Tuple[List[Puzzle], float]:
+        """
+        Run one bounded depth first search from <puzzle>, whose key is <key>,
+        as _bounded_search does, but making moves on a snapshot of <puzzle>
+        (see Puzzle.moves). Every move must cost 1.
+        """
+        seen, key_of = search.seen, search.key_of
+        fail_fast, is_solved = search.fail_fast, search.is_solved
+        moves = search.moves
+        next_bound = _INFINITY
+        table = {}
+        on_path = {key}
+        state = puzzle.snapshot()
+        # as in _bounded_search, but each frame also holds the move that
+        # led to its state
+        node = _SearchNode(state)
+        stack = []
+        search.expand(node, stack)
+        stack.append((node, key, 0, iter(moves(state)), None))
+        while stack:
+            node, key, cost, children, last = stack[-1]
+            move = next(children, _EXHAUSTED)
+            if move is _EXHAUSTED:
+                stack.pop()
+                on_path.discard(key)
+                if last is not None:
+                    state.undo(last)
+                continue
+            state.apply(move)
+            child_key = key_of(state)
+            if child_key in seen or child_key in on_path \
+                    or fail_fast(state):
+                state.undo(move)
+                continue
+            child_cost = cost + 1
+            estimate = child_cost + self._estimate(state)
+            if estimate > bound:
+                next_bound = min(next_bound, estimate)
+                state.undo(move)
+                continue
+            if is_solved(state):
+                return _replay(puzzle, [frame[4] for frame in stack[1:]]
+                               + [move]), bound
+            if self.table_size:
+                if table.get(child_key, _INFINITY) <= child_cost:
+                    state.undo(move)
+                    continue
+                if child_key in table or len(table) < self.table_size:
+                    table[child_key] = child_cost
+            on_path.add(child_key)
+            child_node = _SearchNode(state, node)
+            search.expand(child_node, stack)
+            stack.append((child_node, child_key, child_cost,
+                          iter(moves(state)), move))
+        return [], next_bound
+
+
+class IterativeDeepeningSolver(IDAStarSolver):
+    """"
+    A solver for full-information puzzles that uses iterative deepening
+    depth first search: a depth first search that is repeated with a
+    growing limit on the cost of the path, ignoring any heuristic.
+
+    Like IDAStarSolver, memory use is linear in the depth of the search and
+    the cheapest path is returned.
+    """
+
+    def _estimate(self, puzzle: Puzzle) -> float:
+        """
+        Return 0, so that only the cost of reaching a state is bounded.
+        """
+        return 0
+
+
+class BeamSolver(Solver):
+    """"
+    A solver for full-information puzzles that uses a beam search: a
+    breadth first search that only keeps the best width states of each
+    layer, by their heuristic estimate, and returns the first path found.
+
+    The path is found quickly, but is not necessarily the shortest, and a
+    puzzle can have a solution that is never found. Only the beam and the
+    states it descends from are kept (apart from the seen states, to which
+    only the states kept are added), so memory use grows with width times
+    the depth of the search, however many extensions each state has.
+
+    === Public Attributes ===
+    width: the number of states kept in each layer
+    optimal: whether the result of the most recent search is known to be
+        exact, which it never is for a search that ran out of budget or
+        skipped the initial puzzle as seen: either no state was ever dropped from the beam, so that the
+        search was a full breadth first search, or the path is no longer
+        than the initial puzzle's heuristic estimate (which, for a
+        heuristic that never overestimates and moves that cost 1, means no
+        path is shorter)
+    """
+    width: int
+    optimal: bool
+
+    def __init__(self, width: int = 10, budget: Optional[Budget] = None,
+                 profile: bool = False) -> None:
+        """
+        Create a new beam search solver keeping <width> states in each
+        layer. <budget> and <profile> are as for Solver.
+        """
+        Solver.__init__(self, budget, profile)
+        self.width = width
+        self.optimal = False
+
+    def _search(self, puzzle: Puzzle, search: _Search) -> List[Puzzle]:
+        """
+        Return the first path to a solution of <puzzle> found by a beam
+        search, or an empty list if none was found.
+        """
+        seen, key_of = search.seen, search.key_of
+        fail_fast, is_solved = search.fail_fast, search.is_solved
+        extensions = search.extensions
+        self.optimal = False
+        key = key_of(puzzle)
+        if key in seen or fail_fast(puzzle):
+            return []
+        seen.add(key)
+        if is_solved(puzzle):
+            self.optimal = True
+            return [puzzle]
+        tie = count()
+        dropped = False
+        beam = [_SearchNode(puzzle)]
+        while beam:
+            # heap entries are (-heuristic, -tie, key, node), so that the
+            # worst state kept (the newest, among equal estimates) is on top
+            heap = []
+            kept = set()
+            for node in beam:
+                search.expand(node, heap)
+                for ext in extensions(node.puzzle):
+                    if fail_fast(ext):
+                        continue
+                    ext_key = key_of(ext)
+                    if ext_key in seen or ext_key in kept:
+                        continue
+                    child = _SearchNode(ext, node)
+                    if is_solved(ext):
+                        path = child.path()
+                        self.optimal = (not dropped or len(path) - 1
+                                        <= puzzle.heuristic())
+                        return path
+                    entry = (-ext.heuristic(), -next(tie), ext_key, child)
+                    if len(heap) < self.width:
+                        heappush(heap, entry)
+                        kept.add(ext_key)
+                        continue
+                    dropped = True
+                    if entry > heap[0]:
+                        kept.discard(heapreplace(heap, entry)[2])
+                        kept.add(ext_key)
+            seen.update(kept)
+            beam = [entry[3] for entry in sorted(heap, reverse=True)]
+        self.optimal = not dropped
+        return []
+
+
+class AdaptiveSolver(Solver):
+    """"
+    A solver for full-information puzzles that begins as a breadth first
+    search and switches to iterative deepening if the search grows too
+    large to keep in memory, returning a shortest path either way.
+
+    The memory held by the frontier and the seen states is estimated as the
+    search runs, from the size of each state's key plus a fixed overhead
+    for its entry in the seen set and its search node and puzzle. Once the
+    estimate passes max_bytes, the layer being built is dropped, and depth
+    first searches from each state of the deepest fully explored layer are
+    run with a growing limit on their depth. The seen states are kept, but
+    no longer grow: since every state they hold is closer to the initial
+    puzzle than the depth first searches reach, any state they hold is
+    skipped. The switch is recorded in the search's statistics (switches
+    and switch_depth).
+
+    Each round of depth first searches shares a transposition table holding
+    the smallest depth each state was reached at, so that a state reached
+    again no shallower is skipped. While the table has room for every state
+    reached, deepening stops once a round reaches no state at its limit, so
+    that a puzzle with no solution returns an empty list.
+
+    === Public Attributes ===
+    max_bytes: the estimated number of bytes the frontier and seen states
+        may hold before the search switches to iterative deepening
+    table_size: the maximum number of states held in the transposition
+        table used after the switch. 0 disables the table.
+    """
+    max_bytes: int
+    table_size: int
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024,
+                 table_size: int = 1 << 20,
+                 budget: Optional[Budget] = None,
+                 profile: bool = False) -> None:
+        """
+        Create a new adaptive solver that switches strategy once its search
+        holds about <max_bytes> bytes, and whose transposition table then
+        holds at most <table_size> states. <budget> and <profile> are as for
+        Solver.
+        """
+        Solver.__init__(self, budget, profile)
+        self.max_bytes = max_bytes
+        self.table_size = table_size
+
+    def _search(self, puzzle: Puzzle, search: _Search) -> List[Puzzle]:
+        """
+        Return a shortest path to a solution of <puzzle>, or an empty list
+        if there is none.
+        """
+        seen, key_of = search.seen, search.key_of
+        fail_fast, is_solved = search.fail_fast, search.is_solved
+        extensions = search.extensions
+        key = key_of(puzzle)
+        if key in seen or fail_fast(puzzle):
+            return []
+        seen.add(key)
+        if is_solved(puzzle):
+            return [puzzle]
+        layer = [_SearchNode(puzzle)]
+        held = getsizeof(key) + _SEEN_ENTRY_BYTES + _FRONTIER_ENTRY_BYTES
+        while layer:
+            # the states of the next layer are only added to the seen states
+            # once it is complete, so that the seen states never hold any
+            # state deeper than the last complete layer
+            next_layer = []
+            next_keys = set()
+            for node in layer:
+                search.expand(node, next_layer)
+                for ext in extensions(node.puzzle):
+                    if fail_fast(ext):
+                        continue
+                    ext_key = key_of(ext)
+                    if ext_key in seen or ext_key in next_keys:
+                        continue
+                    child = _SearchNode(ext, node)
+                    if is_solved(ext):
+                        seen.update(next_keys)
+                        seen.add(ext_key)
+                        return child.path()
+                    next_keys.add(ext_key)
+                    next_layer.append(child)
+                    held += (getsizeof(ext_key) + _SEEN_ENTRY_BYTES
+                             + _FRONTIER_ENTRY_BYTES)
+                    if held > self.max_bytes:
+                        del next_layer, next_keys
+                        search.stats.switches += 1
+                        search.stats.switch_depth = node.depth
+                        return _deepen(layer, search, self.table_size)
+            seen.update(next_keys)
+            held -= len(layer) * _FRONTIER_ENTRY_BYTES
+            layer = next_layer
+        return []
+
+
+def _deepen(layer: List[_SearchNode], search: _Search,
+            table_size: int) -> List[Puzzle]:
+    """
+    Return a shortest path to a solution through the nodes of <layer>, the
+    deepest layer fully explored by a breadth first search without finding
+    a solution, or an empty list if there is none.
+
+    Rounds of depth first searches from the nodes of <layer> are run with a
+    depth limit of 1, then 2, and so on, each sharing a transposition table
+    of at most <table_size> states, until one finds a solution or a round
+    reaches no new state at its limit.
+    """
+    limit = 1
+    while True:
+        depth_limit = layer[0].depth + limit
+        table = {}
+        reached_limit = False
+        for node in layer:
+            path, cut_off = _depth_limited(node, search, depth_limit, table,
+                                           table_size)
+            if path:
+                search.seen.update(search.key_of(p) for p in path)
+                return path
+            reached_limit = reached_limit or cut_off
+        if len(table) < table_size:
+            # the table holds every state the round reached, at the smallest
+            # depth it can be reached at, so no state lies beyond the limit
+            # unless one lies at it
+            reached_limit = depth_limit in table.values()
+        if not reached_limit:
+            return []
+        limit += 1
+
+
+def _depth_limited(root: _SearchNode, search: _Search, depth_limit: int,
+                   table: Dict[Hashable, int],
+                   table_size: int) -> Tuple[List[Puzzle], bool]:
+    """
+    Run a depth first search from the state at <root> that goes no deeper
+    than <depth_limit>, skipping the seen states of <search>, the states on
+    the current path and the states in <table> at no greater depth. Up to
+    <table_size> states are kept in <table> with the smallest depth they
+    were reached at.
+
+    Return the path to the first solution found, or an empty list, along
+    with whether the search reached its limit.
+    """
+    seen, key_of = search.seen, search.key_of
+    fail_fast, is_solved = search.fail_fast, search.is_solved
+    extensions = search.extensions
+    key = key_of(root.puzzle)
+    on_path = {key}
+    reached_limit = False
+    stack = []
+    search.expand(root, stack)
+    stack.append((root, key, extensions(root.puzzle)))
+    while stack:
+        node, key, children = stack[-1]
+        child = next(children, _EXHAUSTED)
+        if child is _EXHAUSTED:
+            stack.pop()
+            on_path.discard(key)
+            continue
+        if fail_fast(child):
+            continue
+        child_key = key_of(child)
+        if child_key in seen or child_key in on_path:
+            continue
+        child_node = _SearchNode(child, node)
+        if is_solved(child):
+            return child_node.path(), reached_limit
+        if table_size:
+            if table.get(child_key, depth_limit + 1) <= child_node.depth:
+                continue
+            if child_key in table or len(table) < table_size:
+                table[child_key] = child_node.depth
+        if child_node.depth == depth_limit:
+            reached_limit = True
+            continue
+        on_path.add(child_key)
+        search.expand(child_node, stack)
+        stack.append((child_node, child_key, extensions(child)))
+    return [], reached_limit
+
+
+class ExternalBfsSolver(Solver):
+    """"
+    A solver for full-information puzzles that uses a breadth first search
+    whose layers are kept on disk rather than in memory, for searches too
+    large to fit in memory.
+
+    Each layer is written to a file of records sorted by the states' keys,
+    each holding the (pickled) state and the key of its parent in the layer
+    before. While a layer is expanded, the states reached are gathered into
+    sorted runs of at most run_size states, written to disk as they fill.
+    Once the layer is done, the runs are merged with each other and with
+    the earlier layers, dropping every state already seen (delayed
+    duplicate detection), to make the next layer. Only the last two layers
+    can hold duplicates for reversible puzzles (see Puzzle.is_reversible),
+    but every earlier layer must be merged with for others. The path is
+    rebuilt by following the parent keys back through the layers.
+
+    Memory use is bounded by run_size (plus a record per file being
+    merged), but puzzles must be picklable. A seen set given to solve is
+    only read, not added to, so its states are skipped but it doesn't grow;
+    a Budget's max_seen is not checked.
+
+    === Public Attributes ===
+    directory: the directory the layer files are written to, or None for a
+        new temporary directory for each search
+    run_size: the number of states gathered in memory before they are
+        sorted and written to disk
+    stored: the number of distinct states written to disk by the most
+        recent search
+    """
+    directory: Optional[str]
+    run_size: int
+    stored: int
+
+    def __init__(self, directory: Optional[str] = None,
+                 run_size: int = 100000,
+                 budget: Optional[Budget] = None,
+                 profile: bool = False) -> None:
+        """
+        Create a new external-memory breadth first solver, which writes its
+        layers to <directory> in runs of <run_size> states. <budget> and
+        <profile> are as for Solver.
+        """
+        Solver.__init__(self, budget, profile)
+        self.directory = directory
+        self.run_size = run_size
+        self.stored = 0
+
+    def _search(self, puzzle: Puzzle, search: _Search) -> List[Puzzle]:
+        """
+        Return a shortest path to a solution of <puzzle>, or an empty list
+        if there is none.
+        """
+        key = search.key_of(puzzle)
+        self.stored = 0
+        if key in search.seen or search.fail_fast(puzzle):
+            return []
+        if search.is_solved(puzzle):
+            return [puzzle]
+        if self.directory is None:
+            self.directory = mkdtemp(prefix='bfs-')
+            try:
+                return self._search_from(puzzle, key, search)
+            finally:
+                rmtree(self.directory, ignore_errors=True)
+                self.directory = None
+        return self._search_from(puzzle, key, search)
+
+    def _search_from(self, puzzle: Puzzle, key: Hashable,
+                     search: _Search) -> List[Puzzle]:
+        """
+        Return a shortest path to a solution of <puzzle>, whose key is
+        <key>, that is not solved itself, or an empty list if there is
+        none.
+        """
+        # the root is pickled in full, since the other states refer to the
+        # objects it shares with them
+        _write_records(self._layer_file(0),
+                       [(_key_bytes(key), b'', pickle.dumps(puzzle))])
+        self.stored = 1
+        try:
+            return self._expand_layers(search, puzzle)
+        finally:
+            self._remove_files()
+
+    def _expand_layers(self, search: _Search, root: Puzzle) -> List[Puzzle]:
+        """
+        Expand the layers of a search from <root>, starting from the first
+        layer on disk, until a solution is found or no layer is left.
+        """
+        sharing = _Sharing(root)
+        depth = 0
+        while True:
+            runs, buffer, goal = self._expand_layer(search, root, sharing,
+                                                    depth)
+            if goal is not None:
+                parent, child = goal
+                return self._path(root, sharing, depth, parent) + [child]
+            depth += 1
+            previous = range(max(0, depth - 2) if _is_reversible(root)
+                             else 0, depth)
+            self.stored += _write_records(
+                self._layer_file(depth),
+                _new_states(runs, buffer,
+                            [self._layer_file(d) for d in previous]))
+            for run in runs:
+                os.remove(run)
+            if not os.path.exists(self._layer_file(depth)):
+                return []
+
+    def _expand_layer(self, search: _Search, root: Puzzle,
+                      sharing: _Sharing, depth: int) \
+            -> Tuple[List[str], List[Tuple[bytes, bytes, bytes]],
+                     Optional[Tuple[bytes, Puzzle]]]:
+        """
+        Expand the states in layer <depth> of a search from <root>, writing
+        the states they reach to sorted runs.
+
+        Return the run files, the last, unwritten run (sorted), and the key
+        of the state in the layer with a solved extension paired with that
+        extension, or None if none was found.
+        """
+        seen, key_of = search.seen, search.key_of
+        fail_fast, is_solved = search.fail_fast, search.is_solved
+        extensions = search.extensions
+        runs = []
+        buffer = []
+        for key_bytes, _, payload in _read_records(self._layer_file(depth)):
+            node = _SearchNode(root if depth == 0
+                               else sharing.loads(payload))
+            node.depth = depth
+            search.expand(node, buffer)
+            for ext in extensions(node.puzzle):
+                if fail_fast(ext):
+                    continue
+                ext_key = key_of(ext)
+                if ext_key in seen:
+                    continue
+                if is_solved(ext):
+                    return runs, buffer, (key_bytes, ext)
+                buffer.append((_key_bytes(ext_key), key_bytes,
+                               sharing.dumps(ext)))
+                if len(buffer) >= self.run_size:
+                    buffer.sort(key=_RECORD_KEY)
+                    runs.append(self._run_file(depth + 1, len(runs)))
+                    _write_records(runs[-1], buffer)
+                    buffer = []
+        buffer.sort(key=_RECORD_KEY)
+        return runs, buffer, None
+
+    def _path(self, root: Puzzle, sharing: _Sharing, depth: int,
+              key_bytes: bytes) -> List[Puzzle]:
+        """
+        Return the path from <root> to the state in layer <depth> whose key
+        is <key_bytes>, following the parent keys back through the layers.
+        """
+        path = [None] * (depth + 1)
+        path[0] = root
+        while depth > 0:
+            for record in _read_records(self._layer_file(depth)):
+                if record[0] == key_bytes:
+                    path[depth] = sharing.loads(record[2])
+                    key_bytes = record[1]
+                    break
+            depth -= 1
+        return path
+
+    def _layer_file(self, depth: int) -> str:
+        """
+        Return the name of the file holding layer <depth>.
+        """
+        return os.path.join(self.directory, f'layer-{depth}')
+
+    def _run_file(self, depth: int, index: int) -> str:
+        """
+        Return the name of the file holding the run numbered <index> of the
+        states reached for layer <depth>.
+        """
+        return os.path.join(self.directory, f'run-{depth}-{index}')
+
+    def _remove_files(self) -> None:
+        """
+        Remove the layer and run files of the search.
+        """
+        for name in os.listdir(self.directory):
+            if name.startswith(('layer-', 'run-')):
+                os.remove(os.path.join(self.directory, name))
+
+
+class ResultCache:
+    """
+    A cache of the paths returned by solvers, looked up by the solver's type
+    and settings and the puzzle's type, state_key and cache_context.
+
+    The most recently used results are kept in memory. If the cache has a
+    file, every result is also kept there (in an sqlite database), so that
+    it can be reused by later runs, until the total size of the results in
+    the file grows too large and the least recently used ones are evicted.
+
+    === Public Attributes ===
+    max_entries: the number of results kept in memory
+    max_disk_bytes: the total size, in bytes, of the results kept on disk
+    hits: the number of lookups that found a result
+    disk_hits: the number of those lookups that found it on disk
+    misses: the number of lookups that found no result
+    evictions: the number of results evicted from memory or disk
+
+    === Private Attributes ===
+    _memory: the results kept in memory, from least to most recently used,
+        each by its key and paired with its context
+    _db: the connection to the database on disk, or None
+    _used: the time each result found on disk was last used, by its key,
+        for the results whose time hasn't been written to disk yet
+    """
+    max_entries: int
+    max_disk_bytes: int
+    hits: int
+    disk_hits: int
+    misses: int
+    evictions: int
+    _memory: OrderedDict
+    _db: Optional[sqlite3.Connection]
+    _used: Dict[str, float]
+
+    def __init__(self, filename: Optional[str] = None,
+                 max_entries: int = 1024,
+                 max_disk_bytes: int = 64 * 1024 * 1024) -> None:
+        """
+        Create a new cache keeping up to <max_entries> results in memory and
+        up to <max_disk_bytes> bytes of results in the file <filename>, if it
+        is not None. Results already in the file are reused.
+        """
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = self.disk_hits = self.misses = self.evictions = 0
+        self._memory = OrderedDict()
+        self._db = None
+        self._used = {}
+        if filename is not None:
+            self._db = sqlite3.connect(filename)
+            self._db.execute('CREATE TABLE IF NOT EXISTS results '
+                             '(key TEXT PRIMARY KEY, context TEXT, '
+                             'path BLOB, size INTEGER, used REAL)')
+            self._db.commit()
+
+    def get(self, solver: Solver, puzzle: Puzzle) -> Optional[List[Puzzle]]:
+        """
+        Return the path cached for <solver> solving <puzzle>, starting with
+        <puzzle> itself, or None if there is none. The path is empty if
+        <solver> found no solution.
+        """
+        key, context = _cache_key(solver, puzzle)
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return [puzzle] + entry[1][1:] if entry[1] else []
+        if self._db is not None:
+            row = self._db.execute('SELECT path FROM results WHERE key = ?',
+                                   (key,)).fetchone()
+            if row is not None:
+                self._used[key] = time()
+                path = _Sharing(puzzle).loads(row[0])
+                path = [puzzle] + path[1:] if path else []
+                self._remember(key, context, path)
+                self.hits += 1
+                self.disk_hits += 1
+                return path
+        self.misses += 1
+        return None
+
+    def put(self, solver: Solver, puzzle: Puzzle,
+            path: List[Puzzle]) -> None:
+        """
+        Cache <path> as the path returned by <solver> for <puzzle>.
+        """
+        key, context = _cache_key(solver, puzzle)
+        path = list(path)
+        self._remember(key, context, path)
+        if self._db is not None:
+            payload = _Sharing(puzzle).dumps(path)
+            self._write_used()
+            self._db.execute('INSERT OR REPLACE INTO results '
+                             'VALUES (?, ?, ?, ?, ?)',
+                             (key, context, payload, len(payload), time()))
+            self._evict_from_disk()
+            self._db.commit()
+
+    def invalidate(self, context: Optional[str] = None) -> None:
+        """
+        Remove every result for puzzles whose cache_context is <context>, or
+        every result if <context> is None.
+        """
+        if context is None:
+            self._memory.clear()
+        else:
+            for key in [key for key, entry in self._memory.items()
+                        if entry[0] == context]:
+                del self._memory[key]
+        if self._db is not None:
+            if context is None:
+                self._db.execute('DELETE FROM results')
+            else:
+                self._db.execute('DELETE FROM results WHERE context = ?',
+                                 (context,))
+            self._db.commit()
+
+    def metrics(self) -> Dict[str, int]:
+        """
+        Return the hit, miss and eviction counts of this cache, along with
+        the number of results it holds in memory.
+        """
+        return {'hits': self.hits, 'disk_hits': self.disk_hits,
+                'misses': self.misses, 'evictions': self.evictions,
+                'entries': len(self._memory)}
+
+    def close(self) -> None:
+        """
+        Close the file of this cache, if it has one. Results in memory are
+        still available.
+        """
+        if self._db is not None:
+            self._write_used()
+            self._db.commit()
+            self._db.close()
+            self._db = None
+
+    def _remember(self, key: str, context: str, path: List[Puzzle]) -> None:
+        """
+        Keep <path> in memory under <key>, evicting the least recently used
+        result if there are too many.
+        """
+        self._memory[key] = (context, path)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _write_used(self) -> None:
+        """
+        Write the times the results found on disk were last used to disk,
+        without committing them.
+
+        They are written in a batch when a result is stored or the cache is
+        closed, rather than on every lookup.
+        """
+        if self._used:
+            self._db.executemany('UPDATE results SET used = ? WHERE key = ?',
+                                 [(used, key)
+                                  for key, used in self._used.items()])
+            self._used.clear()
+
+    def _evict_from_disk(self) -> None:
+        """
+        Evict the least recently used results on disk until their total size
+        is within max_disk_bytes.
+        """
+        total = self._db.execute('SELECT TOTAL(size) FROM results').fetchone()
+        if total[0] <= self.max_disk_bytes:
+            return
+        # keep the most recently used results whose sizes, added up from the
+        # most recently used one, are within max_disk_bytes
+        cursor = self._db.execute(
+            'DELETE FROM results WHERE key IN '
+            '(SELECT key FROM (SELECT key, SUM(size) OVER '
+            '(ORDER BY used DESC, key) AS kept FROM results) WHERE kept > ?)',
+            (self.max_disk_bytes,))
+        self.evictions += cursor.rowcount
+
+
+def _key_bytes(key: Hashable) -> bytes:
+    """
+    Return the representation of <key> as bytes, by which the states in an
+    ExternalBfsSolver's files are sorted.
+
+    >>> _key_bytes(('cat', 'dog'))
+    b"('cat', 'dog')"
+    """
+    return repr(key).encode()
+
+
+def _write_records(filename: str,
+                   records: Iterable[Tuple[bytes, bytes, bytes]]) -> int:
+    """
+    Write each record in <records>, a key, a parent key and a pickled
+    state, to the file <filename>, and return the number written.
+
+    No file is written if there are no records.
+    """
+    records = iter(records)
+    first = next(records, None)
+    if first is None:
+        return 0
+    written = 0
+    with open(filename, 'wb') as file:
+        for record in chain([first], records):
+            file.write(_RECORD.pack(*map(len, record)))
+            file.write(b''.join(record))
+            written += 1
+    return written
+
+
+def _read_records(filename: str) -> Iterator[Tuple[bytes, bytes, bytes]]:
+    """
+    Yield each record in the file <filename>, as written by _write_records.
+    """
+    with open(filename, 'rb') as file:
+        header = file.read(_RECORD.size)
+        while header:
+            sizes = _RECORD.unpack(header)
+            yield tuple(file.read(size) for size in sizes)
+            header = file.read(_RECORD.size)
+
+
+def _new_states(runs: List[str], buffer: List[Tuple[bytes, bytes, bytes]],
+                previous: List[str]) -> Iterator[Tuple[bytes, bytes, bytes]]:
+    """
+    Yield, in order of their keys, the records in the sorted files <runs>
+    and the sorted list <buffer> whose keys are not in the sorted files
+    <previous>, only once for each key.
+    """
+    old = [((record[0], 0) for record in _read_records(name))
+           for name in previous]
+    new = [((record[0], 1, record) for record in _read_records(name))
+           for name in runs]
+    new.append((record[0], 1, record) for record in buffer)
+    last = None
+    for entry in merge(*old, *new):
+        if entry[0] != last:
+            last = entry[0]
+            if entry[1]:
+                yield entry[2]
+
+
+def _cache_key(solver: Solver, puzzle: Puzzle) -> Tuple[str, str]:
+    """
+    Return the key under which the path returned by <solver> for <puzzle> is
+    cached, along with <puzzle>'s cache_context.
+    """
+    context_of = getattr(puzzle, 'cache_context', None)
+    context = '' if context_of is None else context_of()
+    return repr((_solver_settings(solver), type(puzzle).__qualname__,
+                 context, _state_key(puzzle))), context
+
+
+# the public attributes of a solver that describe its most recent search,
+# where it keeps its files or what it reports, rather than how it searches,
+# so are left out of the keys of cached results
+_UNKEYED_ATTRIBUTES = ('stats', 'hooks', 'profile', 'optimal', 'restarts',
+                       'stored', 'winner', 'directory')
+
+
+def _solver_settings(solver: Solver) -> Tuple:
+    """
+    Return the type of <solver> along with the settings it searches with,
+    so that the results of solvers of the same type searching differently
+    (a BeamSolver of another width, say) are cached separately.
+
+    >>> _solver_settings(BeamSolver(2)) == _solver_settings(BeamSolver(2))
+    True
+    >>> _solver_settings(BeamSolver(2)) == _solver_settings(BeamSolver(500))
+    False
+    """
+    return (type(solver).__qualname__,) + tuple(
+        (name, _setting(value)) for name, value in sorted(vars(solver).items())
+        if not name.startswith('_') and name not in _UNKEYED_ATTRIBUTES)
+
+
+def _setting(value: object) -> object:
+    """
+    Return a description of the solver setting <value> that is the same in
+    every run.
+    """
+    if isinstance(value, Solver):
+        return _solver_settings(value)
+    elif isinstance(value, (list, tuple)):
+        return tuple(_setting(item) for item in value)
+    elif value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    else:
+        return getattr(value, '__qualname__', type(value).__qualname__)
+
 
-from typing import List, Optional, Set
+class CachingSolver(Solver):
+    """"
+    A solver for full-information puzzles that looks up the path another
+    solver returns for a puzzle in a ResultCache, only running that solver
+    when the path isn't cached.
 
-# You may remove this import if you don't use it in your code.
-from adts import Queue
+    Results are only cached when solve is called without a set of seen
+    states, and not if the search ran out of budget. iter_solutions and
+    count_solutions are left to the other solver.
 
-from puzzle import Puzzle
+    === Public Attributes ===
+    solver: the solver whose results are cached
+    cache: the cache they are kept in
+    """
+    solver: Solver
+    cache: ResultCache
 
+    def __init__(self, solver: Solver, cache: ResultCache) -> None:
+        """
+        Create a new solver caching the results of <solver> in <cache>.
+        """
+        Solver.__init__(self)
+        self.solver = solver
+        self.cache = cache
 
-class Solver:
+    def solve(self, puzzle: Puzzle,
+              seen: Optional[Set[str]] = None) -> List[Puzzle]:
+        """
+        Return the path the other solver returns for <puzzle>, as described
+        in Solver.solve, from the cache if possible.
+        """
+        if seen is None:
+            path = self.cache.get(self.solver, puzzle)
+            if path is not None:
+                self.stats = SearchStats()
+                return SolveResult(path, None, self.stats)
+        result = self.solver.solve(puzzle, seen)
+        self.stats = self.solver.stats
+        if seen is None and not getattr(result, 'exceeded', None):
+            self.cache.put(self.solver, puzzle, result)
+        return result
+
+    def iter_solutions(self, puzzle: Puzzle,
+                       seen: Optional[Set[str]] = None) \
+            -> Iterator[List[Puzzle]]:
+        """
+        Yield the paths to the solutions of <puzzle> found by the other
+        solver, as described in Solver.iter_solutions.
+        """
+        return self.solver.iter_solutions(puzzle, seen)
+
+    def count_solutions(self, puzzle: Puzzle, limit: Optional[int] = None,
+                        seen: Optional[Set[str]] = None) -> int:
+        """
+        Return the number of solutions of <puzzle> counted by the other
+        solver, as described in Solver.count_solutions.
+        """
+        return self.solver.count_solutions(puzzle, limit, seen)
+
+
+# how often (in seconds) a solver with worker processes checks its own budget
+# while waiting for them
+_POLL_INTERVAL = 0.05
+
+# the number of subtrees ParallelDfsSolver aims to give each worker process
+# when it chooses the depth to split the search tree at
+_SUBTREES_PER_WORKER = 4
+
+# the state kept by a worker process between the tasks it is given; 'event'
+# is the event shared with the solver that started the process, which is set
+# to stop the searches still running once the solver has its answer, and
+# 'shared' is the SharedSeenSet its searches use, if any
+_worker_state: Dict[str, object] = {}
+
+
+class _PooledSolver(Solver):
     """"
-    A solver for full-information puzzles. This is an abstract class
-    and purely provides the interface for our solve method.
+    A solver that searches in a pool of worker processes. This is an
+    abstract class that starts, stops and waits for the workers.
+
+    The worker processes are kept between searches; call close (or use the
+    solver as a context manager) to shut them down. Searches in a worker
+    process use their own copy of the seen states (or a SharedSeenSet shared
+    by the worker processes), so the states they reach are not added to the
+    caller's seen set.
+
+    A budget's time limit and cancellation token apply to the whole search,
+    and its limits (except for the cancellation token) apply to each search
+    run in a worker process.
+
+    === Public Attributes ===
+    workers: the number of worker processes
+
+    === Private Attributes ===
+    _executor: the pool of worker processes, or None if it isn't running
+    _event: the event that stops the searches in the worker processes, or
+        None if they aren't running
+    _shared: the seen states shared by the worker processes, or None if
+        each search in a worker process has its own
     """
+    workers: int
+    _executor: Optional[ProcessPoolExecutor]
+    _event: Optional[Event]
+    _shared: Optional[SharedSeenSet]
+
+    def __init__(self, workers: int,
+                 budget: Optional[Budget] = None) -> None:
+        """
+        Create a new solver with <workers> worker processes, limited by
+        <budget>.
+        """
+        Solver.__init__(self, budget)
+        self.workers = workers
+        self._executor = None
+        self._event = None
+        self._shared = None
+
+    def __enter__(self) -> _PooledSolver:
+        """
+        Return this solver, which is closed when the with block ends.
+        """
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """
+        Close this solver.
+        """
+        self.close()
+
+    def close(self) -> None:
+        """
+        Shut down the worker processes of this solver, if it has any.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._shared is not None:
+            self._shared.close()
+            self._shared = None
+
+    def _start_workers(self) -> ProcessPoolExecutor:
+        """
+        Return the pool of worker processes of this solver, ready for a new
+        search, starting it if necessary.
+        """
+        if self._executor is None:
+            self._event = ProcessEvent()
+            self._shared = self._new_shared_seen()
+            self._executor = ProcessPoolExecutor(
+                self.workers, initializer=_init_worker,
+                initargs=(self._event, self._shared))
+        self._event.clear()
+        if self._shared is not None:
+            self._shared.clear()
+        return self._executor
+
+    def _new_shared_seen(self) -> Optional[SharedSeenSet]:
+        """
+        Return the seen states to be shared by the worker processes, or None
+        for each search in a worker process to have its own.
+        """
+        return None
+
+    def _stop_workers(self, futures: Iterable[Future]) -> None:
+        """
+        Stop the searches of <futures> that are still running, which give up
+        at their next step, and wait for them to do so, so that none of them
+        is still running when the next search starts.
+        """
+        self._event.set()
+        wait(futures)
+
+    def _worker_budget(self) -> Optional[Budget]:
+        """
+        Return the budget for searches in the worker processes.
+        """
+        return _without_token(self.budget)
+
+    def _deadline(self) -> Optional[float]:
+        """
+        Return the value of time.monotonic() by which a search starting now
+        must end, or None if there is no time limit.
+        """
+        if self.budget is None or self.budget.time_limit is None:
+            return None
+        return monotonic() + self.budget.time_limit
+
+    def _wait(self, pending: Set[Future], deadline: Optional[float],
+              stats: SearchStats) -> Tuple[Set[Future], Set[Future]]:
+        """
+        Wait for at least one of <pending> to finish, and return those that
+        have finished and those that haven't.
+
+        Raise BudgetExceeded, carrying <stats>, the statistics of the work
+        done so far, if this solver's cancellation token is cancelled or
+        <deadline> passes first.
+        """
+        token = None if self.budget is None else self.budget.token
+        while True:
+            if token is not None and token.is_cancelled():
+                raise BudgetExceeded(CANCELLED, stats)
+            if deadline is not None and monotonic() > deadline:
+                raise BudgetExceeded(TIME_LIMIT, stats)
+            done, not_done = wait(pending, _POLL_INTERVAL, FIRST_COMPLETED)
+            if done:
+                return done, not_done
+
+
+class PortfolioSolver(_PooledSolver):
+    """"
+    A solver for full-information puzzles that races several strategies
+    (other solvers) against each other, each in a worker process of its
+    own, and returns the first result that settles the puzzle: a path to a
+    solution, or an empty path from a strategy that searched to completion.
+    The strategies still running are then cancelled.
+
+    The puzzle is pickled once, however many strategies are raced. A
+    strategy with a budget of its own keeps it, instead of the portfolio's.
+
+    iter_solutions and count_solutions search in this process.
+
+    === Public Attributes ===
+    strategies: the solvers that are raced
+    winner: the strategy whose result was returned by the most recent call
+        to solve, or None
+    """
+    strategies: List[Solver]
+    winner: Optional[Solver]
+
+    def __init__(self, strategies: Optional[List[Solver]] = None,
+                 budget: Optional[Budget] = None) -> None:
+        """
+        Create a new solver racing <strategies>, limited by <budget>. By
+        default, the strategies are DfsSolver, RestartingDfsSolver,
+        BfsSolver and AStarSolver.
+        """
+        if strategies is None:
+            strategies = [DfsSolver(), RestartingDfsSolver(), BfsSolver(),
+                          AStarSolver()]
+        _PooledSolver.__init__(self, len(strategies), budget)
+        self.strategies = strategies
+        self.winner = None
 
-    # You may NOT change the interface to the solve method.
-    # Note the optional parameter seen and its type.
-    # Your implementations of this method in the two subclasses should use seen
-    # to keep track of all puzzle states that you encounter during the
-    # solution process.
     def solve(self, puzzle: Puzzle,
               seen: Optional[Set[str]] = None) -> List[Puzzle]:
         """
-        Return a list of puzzle states representing a path to a solution of
-        <puzzle>. The first element in the list should be <puzzle>, the
-        second element should be a puzzle that is in <puzzle>.extensions(),
-        and so on. The last puzzle in the list should be such that it is in a
-        solved state.
-
-        In other words, each subsequent item of the returned list should take
-        the puzzle one step closer to a solution, which is represented by the
-        last item in the list.
+        Return the first path settling <puzzle> found by any strategy, as
+        described in Solver.solve.
+        """
+        self.winner = None
+        executor = self._start_workers()
+        payload = pickle.dumps(puzzle, pickle.HIGHEST_PROTOCOL)
+        budget = self._worker_budget()
+        running = {executor.submit(_run_strategy, strategy, payload, seen,
+                                   budget): strategy
+                   for strategy in self.strategies}
+        try:
+            result = self._race(running)
+        except BudgetExceeded as error:
+            result = SolveResult([], error.reason, error.stats)
+        finally:
+            self._stop_workers(running)
+        self.stats = result.stats
+        return result
 
-        Return an empty list if the puzzle has no solution.
+    def _race(self, running: Dict[Future, Solver]) -> SolveResult:
+        """
+        Return the first result among the futures in <running> that settles
+        the puzzle, or the result of the last strategy to finish if none
+        does.
 
-        <seen> is either None (default) or a set of puzzle states' string
-        representations, whose puzzle states can't be any part of the path to
-        the solution.
+        Raise BudgetExceeded, carrying the statistics of the strategies that
+        finished between them, if the budget runs out first.
         """
-        raise NotImplementedError
+        pending = set(running)
+        deadline = self._deadline()
+        result = None
+        stats = SearchStats()
+        while pending:
+            done, pending = self._wait(pending, deadline, stats)
+            for future in done:
+                result = future.result()
+                stats.merge(result.stats)
+                if not result.budget_exceeded() and \
+                        (not result or result[-1].is_solved()):
+                    self.winner = running[future]
+                    return result
+        return result
 
 
-# TO DO (Task 2): implement the solve method in the DfsSolver class.
-# Your solve method MUST be a recursive function (i.e. it must make
-# at least one recursive call to itself)
-# You may NOT change the interface to the solve method.
-class DfsSolver(Solver):
+class ParallelDfsSolver(_PooledSolver):
     """"
-    A solver for full-information puzzles that uses
-    a depth first search strategy.
+    A solver for full-information puzzles that uses a depth first search
+    strategy, run in parallel by worker processes.
+
+    The search tree is expanded breadth first, in this process, down to the
+    split depth; each state at that depth is the root of a subtree that is
+    searched depth first by a worker process. Subtrees are handed out one at
+    a time, so a worker that finishes a small subtree goes on to the next
+    one while others are still busy with large ones. Without a split depth,
+    the tree is split as deep as it takes to have several subtrees for each
+    worker.
+
+    solve returns the first path found by any worker, which is not always
+    the path DfsSolver would return, and count_solutions stops every worker
+    as soon as <limit> solutions have been found between them. States that
+    are reachable from more than one subtree may be searched more than
+    once, but each solved state is only counted once.
+
+    With a shared capacity, the workers keep their seen states in a single
+    SharedSeenSet of that capacity, so that no state is searched by more
+    than one of them (except, rarely, by two at once).
+
+    iter_solutions searches in this process.
+
+    === Public Attributes ===
+    split_depth: the depth at which the search tree is split into subtrees,
+        or None to choose it from the number of workers
+    shared_capacity: the number of states the seen set shared by the
+        workers can hold, or 0 for each worker to keep its own
     """
+    split_depth: Optional[int]
+    shared_capacity: int
+
+    def __init__(self, split_depth: Optional[int] = None,
+                 workers: Optional[int] = None,
+                 budget: Optional[Budget] = None,
+                 shared_capacity: int = 0) -> None:
+        """
+        Create a new parallel depth first solver, splitting the search tree
+        at <split_depth>, with <workers> worker processes (by default, one
+        for each CPU), limited by <budget>, whose workers share a seen set
+        of <shared_capacity> states if it is not 0.
+        """
+        _PooledSolver.__init__(self, workers or os.cpu_count() or 1, budget)
+        self.split_depth = split_depth
+        self.shared_capacity = shared_capacity
 
     def solve(self, puzzle: Puzzle,
               seen: Optional[Set[str]] = None) -> List[Puzzle]:
         """
-        Return a list of puzzle states representing a path to a solution of
-        <puzzle>. The first element in the list should be <puzzle>, the
-        second element should be a puzzle that is in <puzzle>.extensions(),
-        and so on. The last puzzle in the list should be such that it is in a
-        solved state.
+        Return the first path to a solution of <puzzle> found by any worker,
+        as described in Solver.solve.
+        """
+        search = self._new_search(seen)
+        try:
+            paths = self._parallel_search(puzzle, search, seen is not None,
+                                          1, True)
+        except BudgetExceeded as error:
+            return SolveResult([], error.reason, search.finish())
+        path = paths[0] if paths else []
+        if path:
+            search.goal(path)
+        return SolveResult(path, None, search.finish())
 
-        In other words, each subsequent item of the returned list should take
-        the puzzle one step closer to a solution, which is represented by the
-        last item in the list.
+    def count_solutions(self, puzzle: Puzzle, limit: Optional[int] = None,
+                        seen: Optional[Set[str]] = None) -> int:
+        """
+        Return the number of distinct solved states that can be reached
+        from <puzzle>, as described in Solver.count_solutions.
+        """
+        search = self._new_search(seen)
+        try:
+            return len(self._parallel_search(puzzle, search, seen is not None,
+                                             limit, False))
+        finally:
+            search.finish()
 
-        Return an empty list if the puzzle has no solution.
+    def _parallel_search(self, puzzle: Puzzle, search: _Search, by_str: bool,
+                         limit: Optional[int], want_paths: bool) -> List:
+        """
+        Return the paths to (if <want_paths>), or else the keys of, up to
+        <limit> distinct solved states reachable from <puzzle>, skipping the
+        states <search> has already seen. <by_str> is whether states are
+        keyed by their string representation.
 
-        <seen> is either None (default) or a set of puzzle states' string
-        representations, whose puzzle states can't be any part of the path to
-        the solution.
+        Raise BudgetExceeded if the search runs out of budget.
         """
-        if seen is None:
-            seen = set()
-        if str(puzzle) in seen or puzzle.fail_fast():
+        # maps the key of each solved state found to the path to it
+        found = {}
+        roots = self._split(puzzle, search, found)
+        if not roots or (limit is not None and len(found) >= limit):
+            return _found(found, limit, want_paths)
+        executor = self._start_workers()
+        budget = self._worker_budget()
+        keys = set(search.seen)
+        if self._shared is not None:
+            # the roots are left out, since each is added by its own worker
+            self._shared.update(keys.difference(
+                search.key_of(root.puzzle) for root in roots))
+            keys = set()
+        running = {executor.submit(
+            _search_subtree, pickle.dumps(root.puzzle, pickle.HIGHEST_PROTOCOL),
+            keys, by_str, budget, limit, want_paths): root for root in roots}
+        pending = set(running)
+        deadline = self._deadline()
+        try:
+            while pending:
+                done, pending = self._wait(pending, deadline, search.stats)
+                for future in done:
+                    solutions, stats, exceeded = future.result()
+                    search.stats.merge(stats)
+                    root = running[future]
+                    for key, path in solutions:
+                        if key not in found:
+                            found[key] = path and root.path() + path[1:]
+                    if limit is not None and len(found) >= limit:
+                        return _found(found, limit, want_paths)
+                    if exceeded is not None:
+                        raise BudgetExceeded(exceeded, search.stats)
+        finally:
+            self._stop_workers(running)
+        return _found(found, limit, want_paths)
+
+    def _split(self, puzzle: Puzzle, search: _Search,
+               found: Dict[Hashable, List[Puzzle]]) -> List[_SearchNode]:
+        """
+        Return the roots of the subtrees the search from <puzzle> is split
+        into, recording the solved states reached on the way (by their key,
+        with the path to them) in <found>.
+        """
+        seen, key_of = search.seen, search.key_of
+        fail_fast, is_solved = search.fail_fast, search.is_solved
+        key = key_of(puzzle)
+        if key in seen or fail_fast(puzzle):
             return []
-        if puzzle.is_solved():
-            seen.add(str(puzzle))
-            return [puzzle]
-        seen.add(str(puzzle))
-        for p in puzzle.extensions():
-            temp = self.solve(p, seen)
-            if temp:  # temp != []
-                return [puzzle] + temp
-            else:
-                seen.add(str(p))
-        return []
+        seen.add(key)
+        if is_solved(puzzle):
+            found[key] = [puzzle]
+            return []
+        target = self.workers * _SUBTREES_PER_WORKER
+        layer = [_SearchNode(puzzle)]
+        depth = 0
+        while layer and (len(layer) < target if self.split_depth is None
+                         else depth < self.split_depth):
+            next_layer = []
+            for node in layer:
+                search.expand(node, next_layer)
+                for ext in search.extensions(node.puzzle):
+                    key = key_of(ext)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    if fail_fast(ext):
+                        continue
+                    child = _SearchNode(ext, node)
+                    if is_solved(ext):
+                        found.setdefault(key, child.path())
+                    else:
+                        next_layer.append(child)
+            layer = next_layer
+            depth += 1
+        return layer
+
+    def _new_shared_seen(self) -> Optional[SharedSeenSet]:
+        """
+        Return a SharedSeenSet of the shared capacity, or None if it is 0.
+        """
+        if not self.shared_capacity:
+            return None
+        return SharedSeenSet(self.shared_capacity)
 
 
-# TO DO (Task 2): implement the solve method in the BfsSolver class.
-# Hint: You may find a Queue useful here.
-class BfsSolver(Solver):
+class ParallelBfsSolver(_PooledSolver):
     """"
-    A solver for full-information puzzles that uses
-    a breadth first search strategy.
+    A solver for full-information puzzles that uses a breadth first search
+    strategy, expanding each layer of the search in parallel.
+
+    Each state is owned by one of the worker processes, chosen by hashing
+    its key, and each worker keeps the part of the seen states (and of the
+    frontier) that it owns. To expand a layer, every worker expands the
+    states it owns and sends each extension to the worker that owns it,
+    which drops the ones it has already seen. The search stops after the
+    first layer that reaches a solved state, so the path returned is as
+    short as the one BfsSolver returns (though not always the same path).
+
+    Puzzles are pickled without the objects that they share with the
+    initial puzzle (such as a word ladder's word set), which every worker
+    already has.
+
+    The budget is checked between layers. iter_solutions and
+    count_solutions search in this process.
+
+    === Private Attributes ===
+    _processes: the worker processes, if they are running
+    _commands: the queue of commands for each worker process
+    _results: the queue the worker processes send their results to
     """
+    _processes: List[Process]
+    _commands: List[Queue]
+    _results: Optional[Queue]
 
-    def solve(self, puzzle: Puzzle,
-              seen: Optional[Set[str]] = None) -> List[Puzzle]:
+    def __init__(self, workers: Optional[int] = None,
+                 budget: Optional[Budget] = None) -> None:
         """
-        Return a list of puzzle states representing a path to a solution of
-        <puzzle>. The first element in the list should be <puzzle>, the
-        second element should be a puzzle that is in <puzzle>.extensions(),
-        and so on. The last puzzle in the list should be such that it is in a
-        solved state.
+        Create a new parallel breadth first solver with <workers> worker
+        processes (by default, one for each CPU), limited by <budget>.
+        """
+        _PooledSolver.__init__(self, workers or os.cpu_count() or 1, budget)
+        self._processes = []
+        self._commands = []
+        self._results = None
 
-        In other words, each subsequent item of the returned list should take
-        the puzzle one step closer to a solution, which is represented by the
-        last item in the list.
+    def close(self) -> None:
+        """
+        Shut down the worker processes of this solver, if it has any.
+        """
+        for commands in self._commands:
+            commands.put(('stop',))
+        for process in self._processes:
+            process.join()
+        self._processes, self._commands, self._results = [], [], None
 
-        Return an empty list if the puzzle has no solution.
+    def solve(self, puzzle: Puzzle,
+              seen: Optional[Set[str]] = None) -> List[Puzzle]:
+        """
+        Return a shortest path to a solution of <puzzle>, as described in
+        Solver.solve.
+        """
+        search = self._new_search(seen)
+        try:
+            path = self._parallel_search(puzzle, search, seen)
+        except BudgetExceeded as error:
+            return SolveResult([], error.reason, error.stats)
+        except BaseException:
+            # a worker process may be stuck part way through a layer
+            self._terminate()
+            raise
+        if path:
+            search.goal(path)
+        return SolveResult(path, None, search.stats)
 
-        <seen> is either None (default) or a set of puzzle states' string
-        representations, whose puzzle states can't be any part of the path to
-        the solution.
+    def _parallel_search(self, puzzle: Puzzle, search: _Search,
+                         seen: Optional[Set[str]]) -> List[Puzzle]:
         """
-        if seen is None:
-            seen = set()
-        if str(puzzle) in seen or puzzle.fail_fast():
+        Return a shortest path to a solution of <puzzle>, skipping the states
+        in the caller-supplied <seen>, or an empty list if there is none.
+        """
+        key = search.key_of(puzzle)
+        if key in search.seen or puzzle.fail_fast():
             return []
         if puzzle.is_solved():
-            seen.add(str(puzzle))
             return [puzzle]
-        q = Queue()
-        q.enqueue([puzzle])
-        lst = []
-        seen.add(str(puzzle))
-        while not q.is_empty():
-            path = q.dequeue()
-            pz = path[-1]
-            for ext in pz.extensions():
+        self._start_shards(puzzle, key, seen)
+        stats = search.stats
+        start = monotonic()
+        deadline = self._deadline()
+        depth = 0
+        while True:
+            stats.elapsed = monotonic() - start
+            self._check_layer(stats, deadline)
+            stats.max_depth = depth
+            depth += 1
+            for commands in self._commands:
+                commands.put(('expand',))
+            frontier = 0
+            solved = None
+            stats.seen_size = 0
+            for _ in self._commands:
+                expanded, seen_size, layer_size, solved_key = \
+                    _result(self._results.get())
+                stats.nodes_expanded += expanded
+                stats.seen_size += seen_size
+                frontier += layer_size
+                if solved is None:
+                    solved = solved_key
+            stats.peak_frontier = max(stats.peak_frontier, frontier)
+            if solved is not None:
+                stats.elapsed = monotonic() - start
+                return self._path_to(solved, _Sharing(puzzle))
+            if not frontier:
+                stats.elapsed = monotonic() - start
+                return []
+
+    def _start_shards(self, puzzle: Puzzle, key: Hashable,
+                      seen: Optional[Set[str]]) -> None:
+        """
+        Start the worker processes if necessary, and give each of them its
+        share of a new search from <puzzle>, whose key is <key>, skipping the
+        states in the caller-supplied <seen>.
+        """
+        if not self._processes:
+            self._results = Queue()
+            inboxes = [Queue() for _ in range(self.workers)]
+            self._commands = [Queue() for _ in range(self.workers)]
+            self._processes = [
+                Process(target=_bfs_worker, daemon=True,
+                        args=(i, self._commands[i], inboxes, self._results))
+                for i in range(self.workers)]
+            for process in self._processes:
+                process.start()
+        shares = [[] for _ in range(self.workers)]
+        for seen_key in seen or ():
+            shares[_shard(seen_key, self.workers)].append(seen_key)
+        payload = pickle.dumps(puzzle, pickle.HIGHEST_PROTOCOL)
+        owner = _shard(key, self.workers)
+        for i, commands in enumerate(self._commands):
+            commands.put(('start', payload, shares[i], seen is not None,
+                          i == owner))
+        for _ in self._commands:
+            _result(self._results.get())
+
+    def _check_layer(self, stats: SearchStats,
+                     deadline: Optional[float]) -> None:
+        """
+        Raise BudgetExceeded if the search, whose statistics are <stats> and
+        which must end by <deadline>, has run out of budget.
+        """
+        budget = self.budget
+        if budget is None:
+            return
+        if budget.token is not None and budget.token.is_cancelled():
+            reason = CANCELLED
+        elif budget.max_nodes is not None \
+                and stats.nodes_expanded > budget.max_nodes:
+            reason = NODE_LIMIT
+        elif budget.max_seen is not None and stats.seen_size > budget.max_seen:
+            reason = SEEN_LIMIT
+        elif deadline is not None and monotonic() > deadline:
+            reason = TIME_LIMIT
+        else:
+            return
+        raise BudgetExceeded(reason, stats)
+
+    def _path_to(self, key: Hashable, sharing: _Sharing) -> List[Puzzle]:
+        """
+        Return the path from the initial puzzle to the state with key <key>,
+        asking the owner of each state on the path for the state it was
+        reached from.
+        """
+        path = []
+        while key is not None:
+            self._commands[_shard(key, self.workers)].put(('parent', key))
+            payload, key = _result(self._results.get())
+            path.append(sharing.loads(payload))
+        path.reverse()
+        return path
+
+    def _terminate(self) -> None:
+        """
+        Kill the worker processes of this solver, if it has any.
+        """
+        for process in self._processes:
+            process.terminate()
+            process.join()
+        self._processes, self._commands, self._results = [], [], None
+
+
+def solve_many(puzzles: Iterable[Puzzle], solver: Optional[Solver] = None,
+               workers: Optional[int] = None, chunksize: int = 1,
+               window: Optional[int] = None) \
+        -> Iterator[Tuple[int, List[Puzzle], SearchStats]]:
+    """
+    Solve each of <puzzles> with <solver> (by default, a DfsSolver) in a pool
+    of <workers> worker processes (by default, one for each CPU), yielding
+    the index of each puzzle in <puzzles>, the path returned by the solver
+    and the statistics of its search, in the order the puzzles are solved.
+
+    Puzzles are sent to the workers <chunksize> at a time, and at most
+    <window> chunks (by default, two for each worker) are in flight at once,
+    so <puzzles> may be a generator of any length.
+
+    The solver is sent to each worker process once, along with the objects
+    referred to by the attributes of the first puzzle (such as a word
+    ladder's word set); puzzles sharing those objects are then sent without
+    them. <solver> must not start worker processes of its own. Its
+    cancellation token, if it has one, stops the whole batch.
+
+    The worker processes are shut down once every puzzle has been solved,
+    or once the caller stops iterating.
+    """
+    if solver is None:
+        solver = DfsSolver()
+    puzzles = enumerate(puzzles)
+    first = next(puzzles, None)
+    if first is None:
+        return
+    puzzles = chain([first], puzzles)
+    workers = workers or os.cpu_count() or 1
+    window = window or 2 * workers
+    token = None if solver.budget is None else solver.budget.token
+    batch_solver = copy(solver)
+    batch_solver.budget = _without_token(solver.budget)
+    batch_solver.hooks = []
+    sharing = _Sharing(first[1])
+    event = ProcessEvent()
+    executor = ProcessPoolExecutor(
+        workers, initializer=_init_batch_worker,
+        initargs=(event, batch_solver,
+                  pickle.dumps(first[1], pickle.HIGHEST_PROTOCOL)))
+    pending = set()
+    try:
+        while True:
+            while len(pending) < window:
+                chunk = list(islice(puzzles, chunksize))
+                if not chunk:
+                    break
+                pending.add(executor.submit(_solve_chunk,
+                                            sharing.dumps(chunk)))
+            if not pending:
+                return
+            if token is not None and token.is_cancelled():
+                return
+            done, pending = wait(pending, _POLL_INTERVAL, FIRST_COMPLETED)
+            for future in done:
+                yield from sharing.loads(future.result())
+    finally:
+        event.set()
+        executor.shutdown(cancel_futures=True)
+
+
+def _found(found: Dict[Hashable, List[Puzzle]], limit: Optional[int],
+           want_paths: bool) -> List:
+    """
+    Return up to <limit> of the paths (if <want_paths>) or keys in <found>.
+    """
+    solutions = list(found.values() if want_paths else found)
+    return solutions if limit is None else solutions[:limit]
+
+
+def _without_token(budget: Optional[Budget]) -> Optional[Budget]:
+    """
+    Return a copy of <budget> without its cancellation token, which can't
+    be sent to another process.
+    """
+    if budget is None:
+        return None
+    return Budget(budget.time_limit, budget.max_nodes, budget.max_seen)
+
+
+def _init_worker(event: Event,
+                 shared: Optional[SharedSeenSet] = None) -> None:
+    """
+    Set up a worker process, whose searches stop once <event> is set, and
+    share the seen states <shared> (if it is not None).
+    """
+    _worker_state['event'] = event
+    _worker_state['shared'] = shared
+
+
+def _worker_token(budget: Optional[Budget]) -> Budget:
+    """
+    Return <budget> (or a new, unlimited budget if it is None), with the
+    cancellation token of this worker process.
+    """
+    if budget is None:
+        budget = Budget()
+    budget.token = CancellationToken(_worker_state['event'])
+    return budget
+
+
+def _run_strategy(strategy: Solver, payload: bytes, seen: Optional[Set[str]],
+                  budget: Optional[Budget]) -> SolveResult:
+    """
+    Return the result of <strategy> solving the pickled puzzle <payload>,
+    in a PortfolioSolver worker process. <budget> is used if the strategy
+    has no budget of its own.
+    """
+    strategy.budget = _worker_token(strategy.budget or budget)
+    return strategy.solve(pickle.loads(payload), seen)
+
+
+def _search_subtree(payload: bytes, keys: Set[Hashable], by_str: bool,
+                    budget: Optional[Budget], limit: Optional[int],
+                    want_paths: bool) \
+        -> Tuple[List[Tuple[Hashable, Optional[List[Puzzle]]]], SearchStats,
+                 Optional[str]]:
+    """
+    Search the subtree rooted at the pickled puzzle <payload> depth first,
+    in a ParallelDfsSolver worker process, skipping the states whose keys
+    are in <keys> (which include the root), or in the SharedSeenSet of the
+    worker process if it has one. <by_str> is whether states are keyed by
+    their string representation.
+
+    Return the key of each of the first <limit> solved states found, paired
+    with the path to it from the root if <want_paths>; the statistics of the
+    search; and the reason it ran out of budget, if it did. A search stopped
+    because the solver already has its answer is not out of budget.
+    """
+    puzzle = pickle.loads(payload)
+    shared = _worker_state['shared']
+    if shared is not None:
+        search = _Search(shared if by_str else None, _worker_token(budget),
+                         backend=lambda: shared)
+    else:
+        search = _Search(keys if by_str else None, _worker_token(budget))
+        if not by_str:
+            search.seen.update(keys)
+        search.seen.discard(search.key_of(puzzle))
+    solutions = []
+    exceeded = None
+    try:
+        for path in _depth_first_paths(puzzle, search):
+            solutions.append((search.key_of(path[-1]),
+                              path if want_paths else None))
+            if len(solutions) == limit:
+                break
+    except BudgetExceeded as error:
+        if not _worker_state['event'].is_set():
+            exceeded = error.reason
+    return solutions, search.finish(), exceeded
+
+
+def _init_batch_worker(event: Event, solver: Solver, payload: bytes) -> None:
+    """
+    Set up a solve_many worker process, which solves puzzles with <solver>
+    until <event> is set. The pickled puzzle <payload> is the first puzzle
+    of the batch, whose shared objects are kept for unpickling the others.
+    """
+    _init_worker(event)
+    solver.budget = _worker_token(solver.budget)
+    _worker_state['solver'] = solver
+    _worker_state['sharing'] = _Sharing(pickle.loads(payload))
+
+
+def _solve_chunk(payload: bytes) -> bytes:
+    """
+    Solve each puzzle in the pickled chunk of (index, puzzle) pairs
+    <payload>, in a solve_many worker process, and return the index of each
+    puzzle with the path to its solution and the statistics of the search,
+    pickled in the same way.
+    """
+    solver = _worker_state['solver']
+    sharing = _worker_state['sharing']
+    results = []
+    for index, puzzle in sharing.loads(payload):
+        path = solver.solve(puzzle)
+        results.append((index, path, path.stats))
+    return sharing.dumps(results)
+
+
+class _Sharing:
+    """
+    The objects referred to by the attributes of the initial puzzle of a
+    search, which are pickled by reference: every process taking part in
+    the search has its own copy of them already. Objects are recognised by
+    identity, so only those that extensions share with the initial puzzle
+    (such as a word ladder's word set) are affected.
+
+    === Private Attributes ===
+    _objects: the objects shared with the initial puzzle
+    _indices: the index in _objects of each object, by its id
+    """
+    __slots__ = ('_objects', '_indices')
+    _objects: List[object]
+    _indices: Dict[int, int]
+
+    def __init__(self, puzzle: Puzzle) -> None:
+        """
+        Record the objects shared with <puzzle>.
+        """
+        self._objects = [value for value in getattr(puzzle, '__dict__',
+                                                    {}).values()
+                         if isinstance(value, (set, frozenset, dict, list))]
+        self._indices = {id(value): i for i, value in enumerate(self._objects)}
+
+    def dumps(self, obj: object) -> bytes:
+        """
+        Return <obj> pickled, with the shared objects pickled by reference.
+        """
+        buffer = io.BytesIO()
+        pickler = pickle.Pickler(buffer, pickle.HIGHEST_PROTOCOL)
+        pickler.persistent_id = self._persistent_id
+        pickler.dump(obj)
+        return buffer.getvalue()
+
+    def loads(self, payload: bytes) -> object:
+        """
+        Return the object pickled in <payload> by dumps.
+        """
+        unpickler = pickle.Unpickler(io.BytesIO(payload))
+        unpickler.persistent_load = self._objects.__getitem__
+        return unpickler.load()
+
+    def _persistent_id(self, obj: object) -> Optional[int]:
+        """
+        Return the index of <obj> if it is a shared object, or None.
+        """
+        index = self._indices.get(id(obj))
+        if index is not None and self._objects[index] is obj:
+            return index
+        return None
+
+
+def _shard(key: Hashable, shards: int) -> int:
+    """
+    Return which of <shards> shards the state with key <key> belongs to.
+
+    The hash of a string differs between processes, so a checksum of the
+    key's representation is used instead.
+
+    >>> _shard(('cat', 'dog'), 4) == _shard(('cat', 'dog'), 4)
+    True
+    """
+    return crc32(repr(key).encode()) % shards
+
+
+def _result(result: object) -> object:
+    """
+    Return <result>, received from a worker process, raising it instead if
+    it is an exception.
+    """
+    if isinstance(result, BaseException):
+        raise result
+    return result
+
+
+def _bfs_worker(index: int, commands: Queue, inboxes: List[Queue],
+                results: Queue) -> None:
+    """
+    Run the worker process <index> of a ParallelBfsSolver, which carries out
+    the commands it receives from <commands> until told to stop.
+
+    Extensions are sent to the other workers through <inboxes>, the queue
+    of each worker, and results are sent to the solver through <results>.
+    """
+    shard = _BfsShard(index, inboxes)
+    while True:
+        command = commands.get()
+        if command[0] == 'stop':
+            return
+        try:
+            results.put(getattr(shard, command[0])(*command[1:]))
+        except Exception as error:
+            results.put(error)
+
+
+class _BfsShard:
+    """
+    The part of a ParallelBfsSolver search owned by one worker process.
+
+    === Private Attributes ===
+    _index: the index of this shard's worker process
+    _inboxes: the queue of each worker process, through which they receive
+        the extensions they own
+    _sharing: the objects shared with the initial puzzle
+    _key_of: the function mapping a puzzle to its key
+    _seen: the keys of the seen states owned by this shard
+    _parents: the state with each key owned by this shard that the search
+        reached, paired with the key of the state it was reached from (None
+        for the initial puzzle)
+    _frontier: the keys and states owned by this shard in the layer to be
+        expanded next
+    """
+    _index: int
+    _inboxes: List[Queue]
+    _sharing: Optional[_Sharing]
+    _key_of: Callable[[Puzzle], Hashable]
+    _seen: Set[Hashable]
+    _parents: Dict[Hashable, Tuple[Puzzle, Optional[Hashable]]]
+    _frontier: List[Tuple[Hashable, Puzzle]]
+
+    def __init__(self, index: int, inboxes: List[Queue]) -> None:
+        """
+        Create the shard of worker process <index>.
+        """
+        self._index = index
+        self._inboxes = inboxes
+        self._sharing = None
+        self._key_of = _state_key
+        self._seen, self._parents, self._frontier = set(), {}, []
+
+    def start(self, payload: bytes, seen: List[Hashable], by_str: bool,
+              owns_root: bool) -> None:
+        """
+        Begin a new search from the pickled puzzle <payload>, skipping the
+        states in <seen> (the keys this shard owns of those supplied by the
+        caller). <by_str> is whether states are keyed by their string
+        representation, and <owns_root> whether this shard owns the initial
+        puzzle.
+        """
+        puzzle = pickle.loads(payload)
+        self._sharing = _Sharing(puzzle)
+        self._key_of = str if by_str else _state_key
+        self._seen, self._parents, self._frontier = set(seen), {}, []
+        if owns_root:
+            key = self._key_of(puzzle)
+            self._seen.add(key)
+            self._parents[key] = (puzzle, None)
+            self._frontier.append((key, puzzle))
+
+    def expand(self) -> Tuple[int, int, int, Optional[Hashable]]:
+        """
+        Expand the states of this shard in the current layer, exchanging
+        extensions with the other shards, to build the next layer.
+
+        Return the number of states expanded, the number of seen states,
+        the size of the next layer and the key of a solved state in the
+        next layer (or None), all in this shard.
+        """
+        key_of = self._key_of
+        batches = [[] for _ in self._inboxes]
+        for key, puzzle in self._frontier:
+            for ext in _iter_extensions(puzzle):
                 if ext.fail_fast():
-                    pass
-                elif ext.is_solved() and str(ext) not in seen:
-                    seen.add(str(ext))
-                    return path + [ext]
-                elif str(ext) not in seen:
-                    seen.add(str(ext))
-                    q.enqueue(path + [ext])
-        return lst
+                    continue
+                ext_key = key_of(ext)
+                batches[_shard(ext_key, len(batches))].append(
+                    (ext_key, ext, key))
+        expanded = len(self._frontier)
+        for inbox, batch in zip(self._inboxes, batches):
+            inbox.put(self._sharing.dumps(batch))
+        self._frontier = []
+        solved = None
+        for _ in self._inboxes:
+            for key, puzzle, parent in self._sharing.loads(
+                    self._inboxes[self._index].get()):
+                if key in self._seen:
+                    continue
+                self._seen.add(key)
+                self._parents[key] = (puzzle, parent)
+                self._frontier.append((key, puzzle))
+                if solved is None and puzzle.is_solved():
+                    solved = key
+        return expanded, len(self._seen), len(self._frontier), solved
+
+    def parent(self, key: Hashable) -> Tuple[bytes, Optional[Hashable]]:
+        """
+        Return the state with key <key>, pickled, and the key of the state it
+        was reached from.
+        """
+        puzzle, parent = self._parents[key]
+        return self._sharing.dumps(puzzle), parent
 
 
 if __name__ == "__main__":
@@ -172,8 +4066,31 @@ if __name__ == "__main__":
                                                            'python_ta',
                                                            'typing',
                                                            '__future__',
-                                                           'puzzle',
-                                                           'adts'],
+                                                           'array',
+                                                           'collections',
+                                                           'concurrent.futures',
+                                                           'copy',
+                                                           'multiprocessing',
+                                                           'multiprocessing.'
+                                                           'shared_memory',
+                                                           'os',
+                                                           'pickle',
+                                                           'random',
+                                                           'shutil',
+                                                           'sqlite3',
+                                                           'struct',
+                                                           'sys',
+                                                           'tempfile',
+                                                           'hashlib',
+                                                           'heapq',
+                                                           'io',
+                                                           'itertools',
+                                                           'json',
+                                                           'operator',
+                                                           'threading',
+                                                           'time',
+                                                           'zlib',
+                                                           'puzzle'],
                                 'disable': ['E1136'],
                                 'max-attributes': 15}
                         )
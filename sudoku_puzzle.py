@@ -28,9 +28,9 @@ Note: Some of the provided code makes use of list comprehensions
 """
 
 from __future__ import annotations
-from typing import List, Set
+from typing import Iterator, List, Optional, Set, Tuple
 from puzzle import Puzzle
-from solver import BfsSolver
+from solver import DfsSolver, Solver
 
 EMPTY_CELL = ' '
 
@@ -169,6 +169,32 @@ class SudokuPuzzle(Puzzle):
         rslt += div
         return rslt.rstrip()
 
+    def state_key(self) -> str:
+        """
+        Return the symbols of this SudokuPuzzle's grid, read row by row,
+        as a single string.
+
+        >>> r1 = ["A", "B", "C", "D"]
+        >>> r2 = ["D", "C", "B", "A"]
+        >>> r3 = [" ", "D", " ", " "]
+        >>> r4 = [" ", " ", " ", " "]
+        >>> s = SudokuPuzzle(4, [r1, r2, r3, r4], {"A", "B", "C", "D"})
+        >>> s.state_key()
+        'ABCDDCBA D      '
+        """
+        return ''.join([''.join(row) for row in self._grid])
+
+    def cache_context(self) -> str:
+        """
+        Return the symbols of this SudokuPuzzle, in sorted order, which its
+        state_key leaves out.
+
+        >>> s = SudokuPuzzle(4, [[" "] * 4] * 4, {"D", "C", "B", "A"})
+        >>> s.cache_context()
+        'ABCD'
+        """
+        return ''.join(sorted(self._symbol_set))
+
     def is_solved(self) -> bool:
         """
         Return True if this SudokuPuzzle is solved, False otherwise.
@@ -209,6 +235,23 @@ class SudokuPuzzle(Puzzle):
                     return False
         return True
 
+    def heuristic(self) -> int:
+        """
+        Return the number of empty cells in this SudokuPuzzle.
+
+        Every move fills exactly one empty cell, so this is the exact number
+        of moves to any solution.
+
+        >>> r1 = ["A", "B", "C", "D"]
+        >>> r2 = ["D", "C", "B", "A"]
+        >>> r3 = [" ", "D", " ", " "]
+        >>> r4 = [" ", " ", " ", " "]
+        >>> s = SudokuPuzzle(4, [r1, r2, r3, r4], {"A", "B", "C", "D"})
+        >>> s.heuristic()
+        7
+        """
+        return sum(row.count(EMPTY_CELL) for row in self._grid)
+
     def extensions(self) -> List[SudokuPuzzle]:
         """
         Return list of extensions of SudokuPuzzle self.
@@ -235,8 +278,59 @@ class SudokuPuzzle(Puzzle):
         >>> all([s in L1 for s in L2])
         True
         """
+        return list(self.iter_extensions())
+
+    def iter_extensions(self) -> Iterator[SudokuPuzzle]:
+        """
+        Return an iterator over the extensions of SudokuPuzzle self, which
+        builds each extension only when it is reached.
+
+        The extensions are those described in extensions, in the same
+        order.
+
+        >>> r1 = ["A", "B", "C", "D"]
+        >>> r2 = ["C", "D", "A", "B"]
+        >>> r3 = ["B", "A", " ", "C"]
+        >>> r4 = ["D", "C", "B", " "]
+        >>> s = SudokuPuzzle(4, [r1, r2, r3, r4], {"A", "B", "C", "D"})
+        >>> print(next(s.iter_extensions()))
+        -------
+        |AB|CD|
+        |CD|AB|
+        -------
+        |BA|DC|
+        |DC|B |
+        -------
+        """
         # temporary variables to give convenient names to each attribute
         symbols, symbol_set, n = self._grid, self._symbol_set, self._n
+
+        # SudokuPuzzles with each legal digit at the first empty position
+        for r, c, symbol in self.moves():
+            # NOTE: type(self)(...) means create a new SudokuPuzzle,
+            # we do this here so that if we were to create a subclass of
+            # SudokuPuzzle later, then this will work as intended
+            yield type(self)(n, symbols[:r]
+                             + [symbols[r][:c]
+                                + [symbol]
+                                + symbols[r][c + 1:]]
+                             + symbols[r + 1:], symbol_set)
+
+    def moves(self) -> List[Tuple[int, int, str]]:
+        """
+        Return the moves that give the extensions of this SudokuPuzzle, in
+        the same order as extensions: each is the row and column of the
+        first empty position, and a symbol allowed there.
+
+        >>> r1 = ["A", "B", "C", "D"]
+        >>> r2 = ["C", "D", "A", "B"]
+        >>> r3 = ["B", "A", " ", "C"]
+        >>> r4 = ["D", "C", "B", " "]
+        >>> s = SudokuPuzzle(4, [r1, r2, r3, r4], {"A", "B", "C", "D"})
+        >>> s.moves()
+        [(2, 2, 'D')]
+        """
+        symbols = self._grid
         if not any(EMPTY_CELL in row for row in symbols):
             return []
         # get position of first empty position
@@ -251,21 +345,38 @@ class SudokuPuzzle(Puzzle):
                                  - (self._row_set(r)
                                     | self._column_set(c)
                                     | self._subsquare_set(r, c)))
-        # print(allowed_symbols)
+        return [(r, c, symbol) for symbol in allowed_symbols]
 
-        # list of SudokuPuzzles with each legal digit at position r, c
-        return_lst = []
-        for symbol in allowed_symbols:
-            # NOTE: type(self)(...) means create a new SudokuPuzzle,
-            # we do this here so that if we were to create a subclass of
-            # SudokuPuzzle later, then this will work as intended
-            new_puzzle = type(self)(n, symbols[:r]
-                                    + [symbols[r][:c]
-                                       + [symbol]
-                                       + symbols[r][c + 1:]]
-                                    + symbols[r + 1:], symbol_set)
-            return_lst.append(new_puzzle)
-        return return_lst
+    def apply(self, move: Tuple[int, int, str]) -> None:
+        """
+        Fill in the position of <move> with its symbol.
+
+        >>> s = SudokuPuzzle(4, [[" "] * 4 for _ in range(4)], \
+                             {"A", "B", "C", "D"})
+        >>> s.apply((0, 0, "B"))
+        >>> s.state_key()[:2]
+        'B '
+        >>> s.undo((0, 0, "B"))
+        >>> s.state_key()[:2]
+        '  '
+        """
+        self._grid[move[0]][move[1]] = move[2]
+
+    def undo(self, move: Tuple[int, int, str]) -> None:
+        """
+        Empty the position filled in by <move>.
+        """
+        self._grid[move[0]][move[1]] = EMPTY_CELL
+
+    def snapshot(self) -> SudokuPuzzle:
+        """
+        Return a new SudokuPuzzle with a copy of this SudokuPuzzle's grid.
+
+        Extensions share the rows they don't change with this puzzle, so
+        moves are only ever applied to snapshots.
+        """
+        return type(self)(self._n, [row[:] for row in self._grid],
+                          self._symbol_set)
 
     # TO DO (Task 1): override fail_fast
     # If there is an open position with no symbols available
@@ -358,7 +469,7 @@ class SudokuPuzzle(Puzzle):
     # TO DO (Task 2): implement has_unique_solution
     # Implement this method according to its docstring
     # You may import any modules that you need when implementing this method.
-    def has_unique_solution(self) -> bool:
+    def has_unique_solution(self, solver: Optional[Solver] = None) -> bool:
         """
         Return True if the this Sudoku puzzle has exactly one unique solution,
         and False otherwise.
@@ -366,16 +477,12 @@ class SudokuPuzzle(Puzzle):
         Two "solutions" are considered to be equal if the final puzzle
         state is the same.
 
-        Hint: You should find the optional parameter, seen, for the Solver
-        class' solve method very useful here.
+        Solutions are counted using <solver>, or a DfsSolver if <solver> is
+        None. The search stops as soon as a second solution is found.
         """
-        bfs = BfsSolver()
-        result = bfs.solve(self)
-        if not result:
-            return False
-        else:
-            seen = {str(result[-1])}
-            return bfs.solve(self, seen) == []
+        if solver is None:
+            solver = DfsSolver()
+        return solver.count_solutions(self, 2) == 1
 
 
 if __name__ == "__main__":
@@ -21,9 +21,10 @@ This module contains the word ladder puzzle class.
 """
 
 from __future__ import annotations
-from typing import Optional, Set, List
+from hashlib import sha1
+from typing import Iterator, Optional, Set, List, Tuple
 from puzzle import Puzzle
-from solver import BfsSolver
+from solver import BfsSolver, Solver
 
 # difficulty constants
 IMPOSSIBLE = 'impossible'
@@ -43,6 +44,18 @@ def load_words() -> set[str]:
         return set(words.read().split())
 
 
+def words_digest(word_set: Set[str]) -> str:
+    """
+    Return a digest of the words in <word_set>.
+
+    >>> words_digest({"me", "my"}) == words_digest({"my", "me"})
+    True
+    >>> words_digest({"me", "my"}) == words_digest({"me", "ma"})
+    False
+    """
+    return sha1('\n'.join(sorted(word_set)).encode()).hexdigest()
+
+
 class WordLadderPuzzle(Puzzle):
     """
     A word-ladder puzzle.
@@ -128,6 +141,63 @@ class WordLadderPuzzle(Puzzle):
         """
         return self.from_word + ' -> ' + self.to_word
 
+    def state_key(self) -> Tuple[str, str]:
+        """
+        Return the pair (from_word, to_word) identifying this
+        WordLadderPuzzle's state.
+
+        >>> WordLadderPuzzle("me", "my", {"me", "my", "ma"}).state_key()
+        ('me', 'my')
+        """
+        return self.from_word, self.to_word
+
+    def heuristic(self) -> int:
+        """
+        Return the number of positions at which from_word and to_word
+        differ.
+
+        Each move changes one character, so this never overestimates the
+        number of moves left.
+
+        >>> WordLadderPuzzle("cost", "cast", {"cost", "cast"}).heuristic()
+        1
+        >>> WordLadderPuzzle("same", "cost", {"same", "cost"}).heuristic()
+        4
+        """
+        return sum(a != b for a, b in zip(self.from_word, self.to_word))
+
+    def is_reversible(self) -> bool:
+        """
+        Return True, since any change of one character can be undone.
+        """
+        return True
+
+    def goal_state(self) -> WordLadderPuzzle:
+        """
+        Return the solved WordLadderPuzzle whose from_word is this puzzle's
+        to_word.
+
+        >>> wl = WordLadderPuzzle("me", "my", {"me", "my", "ma"})
+        >>> print(wl.goal_state())
+        my -> my
+        """
+        return WordLadderPuzzle(self.to_word, self.to_word, self.word_set)
+
+    def cache_context(self) -> str:
+        """
+        Return a digest of this WordLadderPuzzle's word set, so that cached
+        results are not reused once the word list changes.
+
+        >>> wl1 = WordLadderPuzzle("me", "my", {"me", "my", "ma"})
+        >>> wl2 = WordLadderPuzzle("me", "my", {"my", "ma", "me"})
+        >>> wl3 = WordLadderPuzzle("me", "my", {"me", "my"})
+        >>> wl1.cache_context() == wl2.cache_context()
+        True
+        >>> wl1.cache_context() == wl3.cache_context()
+        False
+        """
+        return words_digest(self.word_set)
+
     # TO DO (Task 3): override is_solved
     # Note: A WordLadderPuzzle is solved when from_word is the same as its
     # to_word
@@ -165,29 +235,88 @@ class WordLadderPuzzle(Puzzle):
         >>> len(wl1_extensions) == 2
         True
         """
+        return list(self.iter_extensions())
+
+    def iter_extensions(self) -> Iterator[WordLadderPuzzle]:
+        """
+        Return an iterator over the WordLadderPuzzles that are one step
+        away from this WordLadderPuzzle, in the same order as extensions.
+
+        >>> wl1 = WordLadderPuzzle("me", "my", {"me", "be", "my"})
+        >>> print(next(wl1.iter_extensions()))
+        be -> my
+        """
         f_word = self.from_word
         t_word = self.to_word
         word_set = self.word_set
-        lst = []
         index = 0
         while index < len(f_word):
             for char in self._chars:
                 new_word = f_word[:index] + char + f_word[index + 1:]
-                if char != f_word[index] and new_word in self.word_set:
-                    p = WordLadderPuzzle(new_word, t_word, word_set)
-                    lst.append(p)
+                if char != f_word[index] and new_word in word_set:
+                    yield WordLadderPuzzle(new_word, t_word, word_set)
             index += 1
-        return lst
+
+    def moves(self) -> List[Tuple[str, str]]:
+        """
+        Return the moves that give the extensions of this WordLadderPuzzle,
+        in the same order as extensions: each is the pair of from_word and
+        the word it changes to.
+
+        >>> wl = WordLadderPuzzle("me", "my", {"me", "be", "my"})
+        >>> wl.moves()
+        [('me', 'be'), ('me', 'my')]
+        """
+        f_word = self.from_word
+        word_set = self.word_set
+        moves = []
+        for index in range(len(f_word)):
+            for char in self._chars:
+                new_word = f_word[:index] + char + f_word[index + 1:]
+                if char != f_word[index] and new_word in word_set:
+                    moves.append((f_word, new_word))
+        return moves
+
+    def apply(self, move: Tuple[str, str]) -> None:
+        """
+        Change from_word to the second word of <move>.
+
+        >>> wl = WordLadderPuzzle("me", "my", {"me", "be", "my"})
+        >>> wl.apply(('me', 'be'))
+        >>> print(wl)
+        be -> my
+        >>> wl.undo(('me', 'be'))
+        >>> print(wl)
+        me -> my
+        """
+        self.from_word = move[1]
+
+    def undo(self, move: Tuple[str, str]) -> None:
+        """
+        Change from_word back to the first word of <move>.
+        """
+        self.from_word = move[0]
+
+    def snapshot(self) -> WordLadderPuzzle:
+        """
+        Return a new WordLadderPuzzle with the same words as this one,
+        sharing its word_set.
+        """
+        return WordLadderPuzzle(self.from_word, self.to_word, self.word_set)
 
     # TO DO (Task 3): implement get_difficulty
     # Note: implementing this requires you to have completed Task 2
     # Hint: Think about which of BfsSolver and DfsSolver is the right
     #       solver for the task at hand. (You may add any required
     #       imports at the top of the file.)
-    def get_difficulty(self) -> str:
+    def get_difficulty(self, solver: Optional[Solver] = None) -> str:
         """
         Return the "difficulty" of this puzzle.
 
+        The shortest path is found using <solver>, which must return
+        shortest paths (e.g. BfsSolver, AStarSolver or IDAStarSolver). If
+        <solver> is None, a BfsSolver is used.
+
         The difficulty is defined as follows:
 
         TRIVIAL - a solution can be reached in zero moves or just one move
@@ -205,9 +334,10 @@ class WordLadderPuzzle(Puzzle):
         IMPOSSIBLE - a solution does not exist
         """
 
-        bfs = BfsSolver()
+        if solver is None:
+            solver = BfsSolver()
 
-        diff = len(bfs.solve(self)) - 1
+        diff = len(solver.solve(self)) - 1
         if diff == -1:
             return IMPOSSIBLE
         elif diff <= 1:
@@ -232,6 +362,7 @@ if __name__ == '__main__':
                                                            'python_ta',
                                                            'typing',
                                                            '__future__',
+                                                           'hashlib',
                                                            'puzzle',
                                                            'solver'],
                                 'disable': ['E1136'],